@@ -1,149 +1,103 @@
 
 from flask import Flask, render_template, request, jsonify
 import numpy as np
-from pricing import VanillaFxOptionPricer, VolatilitySurface
+from pricing import price_structure, price_chain
+from serialization import encode_response
+from market_registry import MarketRegistry
+from context import ContextPool
+import profiling
+import backends
 
 app = Flask(__name__)
+profiling.init_app(app)
+backends.warmup()
+
+# Published market snapshots, shared by all request threads
+registry = MarketRegistry()
+
+# Reusable pricing contexts, one borrowed per request
+context_pool = ContextPool()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def build_market(data, context):
+    # Pricer and constructed smile for a request, plus the snapshot they came from.
+    # With 'pair' (and optionally 'version') the published snapshot is used as-is,
+    # otherwise the market is built from the raw fields (snapshot is None) into
+    # the request's borrowed PricingContext.
+    if data.get('pair') is not None:
+        snapshot = registry.get(data['pair'], data.get('version'))
+        return snapshot.pricer, snapshot.surface, snapshot
+
+    # Parse inputs
+    spot_ref = float(data.get('spot_ref', 1.0))
+    rd = float(data.get('rd', 0.0))
+    # rf -> replaced by forward
+    forward = float(data.get('forward', 1.0)) # Default to spot if not provided?
+    T = float(data.get('T', 1.0))
+    
+    # Vol constants
+    atm = float(data.get('atm', 0.1))
+    rr25 = float(data.get('rr25', 0.0))
+    st25 = float(data.get('st25', 0.0))
+    rr10 = float(data.get('rr10', 0.0))
+    st10 = float(data.get('st10', 0.0))
+    smile_model = data.get('smile_model', 'spline') # 'spline' or 'vanna_volga'
+    
+    # Pricer with forward and constructed surface, reusing the context's objects
+    pricer, surface = context.load(spot_ref, rd, forward, T, atm, rr25, st25, rr10, st10, smile_model)
+    return pricer, surface, None
+
+@app.route('/market/<path:pair>', methods=['POST'])
+def publish_market(pair):
+    # Publish a new snapshot for pair from the market fields of the payload
+    try:
+        snapshot = registry.publish(pair, request.json)
+        return jsonify({'success': True, 'pair': pair, 'version': snapshot.version})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+@app.route('/market/<path:pair>', methods=['GET'])
+def get_market(pair):
+    # Latest snapshot, or ?version=N
+    try:
+        snapshot = registry.get(pair, request.args.get('version'))
+        return jsonify({'success': True, **snapshot.describe(), 'versions': registry.versions(pair)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 404
+
 @app.route('/calculate', methods=['POST'])
+@profiling.profiled
 def calculate():
+    context = context_pool.acquire()
     try:
         data = request.json
         
-        # Parse inputs
-        spot_ref = float(data.get('spot_ref', 1.0))
-        rd = float(data.get('rd', 0.0))
-        # rf -> replaced by forward
-        forward = float(data.get('forward', 1.0)) # Default to spot if not provided?
-        T = float(data.get('T', 1.0))
-        
-        # Vol constants
-        atm = float(data.get('atm', 0.1))
-        rr25 = float(data.get('rr25', 0.0))
-        st25 = float(data.get('st25', 0.0))
-        rr10 = float(data.get('rr10', 0.0))
-        st10 = float(data.get('st10', 0.0))
-        
         # Contract
         strike_input = float(data.get('strike', 1.0))
         strike_type = data.get('strike_type', 'price') # 'price' or 'delta'
         option_type = data.get('type', 'call')
         
-        # Init pricer with forward
-        pricer = VanillaFxOptionPricer(spot_ref, rd, forward, T)
+        pricer, surface, snapshot = build_market(data, context)
         
-        # Construct surface
-        surface = VolatilitySurface(atm, rr25, st25, rr10, st10)
-        surface.construct_smile(pricer)
+        strike_2_input = data.get('strike_2')
+        if strike_2_input is not None:
+            strike_2_input = float(strike_2_input)
         
-        # Determine actual strike
         # Determine actual strike(s)
-        strike_2 = None # For Strangle by Price
-        
-        if option_type == 'strangle':
-            if strike_type == 'delta':
-                # Symmetric Delta Strangle (e.g. 25 Delta -> 25d Put + 25d Call)
-                # Solve for Put Strike (Delta = -strike_input, or abs=strike_input)
-                k_put = pricer.solve_strike_for_delta(strike_input, 'put', surface)
-                k_call = pricer.solve_strike_for_delta(strike_input, 'call', surface)
-                
-                if k_put is None or k_call is None:
-                    return jsonify({'success': False, 'message': 'Could not solve strikes for strangle delta'}), 400
-                
-                strike = k_put # We'll report both or just the first? Let's treat 'strike' as K_put and 'strike_2' as K_call for reporting
-                strike_2 = k_call
-                
-            else:
-                # Strangle by Price
-                # strike_input is Put Strike (K_low)
-                # Data should have strike_2 for Call Strike (K_high)
-                strike_2_input = float(data.get('strike_2', strike_input)) # Fallback to same if missing
-                strike = strike_input
-                strike_2 = strike_2_input
-                
-            # Price Strangle = Price(Put, K_put) + Price(Call, K_call)
-            vol_put = surface.get_vol(strike)
-            vol_call = surface.get_vol(strike_2)
-            
-            p_put = pricer.price(vol_put, strike, 'put')
-            p_call = pricer.price(vol_call, strike_2, 'call')
-            
-            price = p_put + p_call
-            
-            # Weighted vol? Or average? 
-            # Usually return separate vols or just one representative. Let's return avg or list?
-            # Existing specific 'vol' field expects float. Let's return average for now or just vol_put.
-            interp_vol = (vol_put + vol_call) / 2.0 
-            
-        elif option_type == 'risk_reversal':
-            # Risk Reversal = Long Call (High K) - Short Put (Low K)
-            # Usually defined by Delta (e.g. 25 Delta RR = 25d Call - 25d Put)
-            
-            if strike_type == 'delta':
-                # Symmetric Delta (e.g. 25 Delta -> 25d Put + 25d Call)
-                # Solve for Put Strike (Delta = -strike_input)
-                # Solve for Call Strike (Delta = strike_input)
-                k_put = pricer.solve_strike_for_delta(strike_input, 'put', surface)
-                k_call = pricer.solve_strike_for_delta(strike_input, 'call', surface)
-                
-                if k_put is None or k_call is None:
-                    return jsonify({'success': False, 'message': 'Could not solve strikes for RR delta'}), 400
-                
-                strike = k_put # Low Strike (Short Put)
-                strike_2 = k_call # High Strike (Long Call)
-                
-            else:
-                # RR by Price
-                # strike_input = Put Strike (K_low)
-                # strike_2_input = Call Strike (K_high)
-                strike_2_input = float(data.get('strike_2', strike_input)) 
-                strike = strike_input
-                strike_2 = strike_2_input
-            
-            # Price RR = Price(Call, K_call) - Price(Put, K_put)
-            vol_put = surface.get_vol(strike)
-            vol_call = surface.get_vol(strike_2)
-            
-            p_put = pricer.price(vol_put, strike, 'put')
-            p_call = pricer.price(vol_call, strike_2, 'call')
-            
-            price = p_call - p_put
-            
-            interp_vol = (vol_put + vol_call) / 2.0
-            
-        elif strike_type == 'delta':
-            # ... existing single leg delta logic ...
-            # strike_input is treated as delta (e.g. 0.25)
-            # Cap at reasonable values 0 < delta < 1
-            if strike_input <= 0 or strike_input >= 1:
-                 return jsonify({'success': False, 'message': 'Delta must be between 0 and 1'}), 400
-                 
-            solved_k = pricer.solve_strike_for_delta(strike_input, option_type, surface)
-            if solved_k is None:
-                return jsonify({'success': False, 'message': 'Could not solve strike for given delta'}), 400
-            strike = solved_k
-            interp_vol = surface.get_vol(strike)
-            price = pricer.price(interp_vol, strike, option_type)
-            
-        else:
-            # Single leg by Price
-            strike = strike_input
-            interp_vol = surface.get_vol(strike)
-            price = pricer.price(interp_vol, strike, option_type)
+        price, interp_vol, strike, strike_2 = price_structure(
+            pricer, surface, option_type, strike_type, strike_input, strike_2_input
+        )
         
-        
-        # Prepare Plot Data
         # Prepare Plot Data
         # Knots: [10d Put, 25d Put, ATM, 25d Call, 10d Call]
         # User requested: 10d, 25d, ATM, 75d, 90d (implying Call Deltas)
         # 10d Put ~ 90d Call
         # 25d Put ~ 75d Call
-        knots_x = surface.strikes
-        knots_y = surface.vols
+        knots_x = np.asarray(surface.strikes)
+        knots_y = np.asarray(surface.vols)
         # Assuming sorted: [0]=10dPut (Low K), [1]=25dPut, [2]=ATM, [3]=25dCall, [4]=10dCall (High K)
         # User requested sequence: 10, 25, ATM, 75, 90 (Likely mapping Low K to 10d and High K to 90d?)
         # Or simply preferring ascending delta labels (Put Delta -> Call Delta convention mix?)
@@ -152,39 +106,22 @@ def calculate():
         # Curve generation
         min_k = knots_x[0] * 0.8
         max_k = knots_x[-1] * 1.2
-        curve_x = np.linspace(min_k, max_k, 50).tolist()
-        curve_y = [surface.get_vol(k) for k in curve_x]
+        curve_x = context.curve_strikes(min_k, max_k)
+        curve_y = surface.get_vol(curve_x)
         
-        # Calculate Sensitivities
+        # Calculate Sensitivities (bumped smiles are rebuilt in the context's scratch surface)
         bs_vega = pricer.calculate_vega(strike, interp_vol)
-        model_sens = pricer.calculate_model_sensitivities(strike, option_type, surface)
+        model_sens = context.model_sensitivities(pricer, surface, strike, option_type)
         
         # Calculate Payoff Curve (at Maturity) vs Spot
         # Use same range as curve_x (strikes) but treated as Spot prices
         spot_range = curve_x 
-        payoff_y = []
         
-        for s_val in spot_range:
-            val = 0.0
-            if option_type == 'strangle':
-                # Put (K_low) + Call (K_high)
-                # K_low = strike, K_high = strike_2
-                # Payoff = max(K_low - S, 0) + max(S - K_high, 0)
-                val = max(strike - s_val, 0) + max(s_val - strike_2, 0)
-                
-            elif option_type == 'risk_reversal':
-                # Long Call (K_high) - Short Put (K_low)
-                # K_low = strike, K_high = strike_2
-                val = max(s_val - strike_2, 0) - max(strike - s_val, 0)
-
-            elif option_type == 'call':
-                val = max(s_val - strike, 0)
-            elif option_type == 'put':
-                val = max(strike - s_val, 0)
-            
-            payoff_y.append(val)
-
-        return jsonify({
+        # Strangle: put (K_low) + call (K_high); risk reversal: long call (K_high) - short put (K_low)
+        payoff_y = context.payoff(option_type, strike, strike_2, spot_range)
+
+        # Negotiated encoding (JSON, raw float64 or MessagePack), arrays go out as-is
+        return encode_response({
             'success': True,
             'price': price,
             'vol': interp_vol,
@@ -194,6 +131,7 @@ def calculate():
             'atm_strike': getattr(surface, 'k_atm', None),
             'vega': bs_vega,
             'model_vega': model_sens,
+            'market_version': snapshot.version if snapshot else None,
             'message': 'Priced successfully',
             'plot_data': {
                 'curve_x': curve_x,
@@ -204,10 +142,76 @@ def calculate():
                 'points_y': knots_y,
                 'point_labels': labels
             }
-        })
+        }, request.accept_mimetypes)
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    finally:
+        # Response bytes are already encoded, the context's buffers are free again
+        context_pool.release(context)
 
+# Upper bound on ladder length for /chain
+MAX_CHAIN_POINTS = 2000
+
+def _ladder(data, key):
+    # Explicit list ('strikes' / 'deltas') or evenly spaced range ('strike_range' / 'delta_range': [lo, hi, n])
+    # The length is checked before anything is allocated
+    if data.get(key) is not None:
+        values = data[key] if isinstance(data[key], list) else [data[key]]
+        n = len(values)
+    elif data.get(key[:-1] + '_range') is not None:
+        lo, hi, n = data[key[:-1] + '_range']
+        n = int(n)
+    else:
+        return None
+    if not 1 <= n <= MAX_CHAIN_POINTS:
+        raise ValueError(f'Ladder must have between 1 and {MAX_CHAIN_POINTS} points')
+    if data.get(key) is not None:
+        # Flat numbers only: a nested list would get past the length check
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+            raise ValueError(f'{key} must be a number or a flat list of numbers')
+        return np.asarray(values, dtype=float)
+    return np.linspace(float(lo), float(hi), n)
+
+def _flag(data, key, default):
+    # JSON booleans only, so that e.g. the string "false" is not taken as true
+    value = data.get(key, default)
+    if not isinstance(value, bool):
+        raise ValueError(f'{key} must be true or false')
+    return value
+
+@app.route('/chain', methods=['POST'])
+@profiling.profiled
+def chain():
+    # Price, vol, delta and vega (plus model vegas) across a strike or delta ladder on one smile
+    context = context_pool.acquire()
+    try:
+        data = request.json
+        option_type = data.get('type', 'call')
+        if option_type not in ('call', 'put'):
+            raise ValueError('Chains are priced for call or put ladders')
+        
+        pricer, surface, snapshot = build_market(data, context)
+        result = price_chain(
+            pricer, surface, option_type,
+            strikes=_ladder(data, 'strikes'), deltas=_ladder(data, 'deltas'),
+            sensitivities=_flag(data, 'sensitivities', True)
+        )
+        
+        return encode_response({
+            'success': True,
+            'type': option_type,
+            'forward': pricer.calculate_forward(),
+            'atm_strike': surface.k_atm,
+            'chain': result,
+            'market_version': snapshot.version if snapshot else None,
+            'message': 'Priced successfully',
+        }, request.accept_mimetypes)
+    
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 400
+    finally:
+        context_pool.release(context)
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
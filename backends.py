@@ -0,0 +1,213 @@
+import math
+import os
+import numpy as np
+from scipy.special import ndtr
+
+# Compute backends for the array paths of the pricer and the spline smile.
+#
+# Every backend exposes the same kernels over broadcastable inputs:
+#   d1(F, K, sigma, T), d2(F, K, sigma, T)
+#   price(F, K, sigma, T, rd, is_call)
+#   delta(F, K, sigma, T, rf, is_call)          spot delta
+#   vega(S, F, K, sigma, T, rf)
+#   spline_vol(K, breakpoints, coeffs)          PPoly smile, flat outside the knots
+# with the pricer's conventions: d1 = 0 wherever T <= 0 or sigma <= 0.
+#
+# 'numpy' is always available. 'numba' fuses each kernel into a single
+# element-wise ufunc (no temporaries, scalar inputs are broadcast rather than
+# copied) and is used automatically when numba is installed. The loops
+# are deliberately serial: numba's default threading layer must not be entered
+# from several request threads at once, and the service parallelizes per request.
+# PRICER_BACKEND=numpy|numba|auto overrides the choice at import time.
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+class NumpyBackend:
+    name = 'numpy'
+
+    @staticmethod
+    def d1(F, K, sigma, T):
+        F, K, sigma, T = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (F, K, sigma, T)))
+        live = (T > 0) & (sigma > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d_1 = (np.log(F / K) + 0.5 * sigma**2 * T) / (sigma * np.sqrt(T))
+        return np.where(live, d_1, 0.0)
+
+    @classmethod
+    def d2(cls, F, K, sigma, T):
+        with np.errstate(invalid='ignore'):
+            return cls.d1(F, K, sigma, T) - sigma * np.sqrt(T)
+
+    @classmethod
+    def price(cls, F, K, sigma, T, rd, is_call):
+        d_1 = cls.d1(F, K, sigma, T)
+        with np.errstate(invalid='ignore'):
+            d_2 = d_1 - sigma * np.sqrt(T)
+        df = np.exp(-np.asarray(rd) * T)
+        if is_call:
+            return df * (F * ndtr(d_1) - K * ndtr(d_2))
+        return df * (K * ndtr(-d_2) - F * ndtr(-d_1))
+
+    @classmethod
+    def delta(cls, F, K, sigma, T, rf, is_call):
+        df_rf = np.exp(-np.asarray(rf) * T)
+        n1 = ndtr(cls.d1(F, K, sigma, T))
+        return df_rf * (n1 if is_call else n1 - 1.0)
+
+    @classmethod
+    def vega(cls, S, F, K, sigma, T, rf):
+        d_1 = cls.d1(F, K, sigma, T)
+        T = np.maximum(T, 0.0)
+        return S * np.exp(-np.asarray(rf) * T) * np.sqrt(T) * np.exp(-0.5 * d_1**2) / math.sqrt(2.0 * math.pi)
+
+    @staticmethod
+    def spline_vol(K, breakpoints, coeffs):
+        # Same as PPoly(coeffs, breakpoints)(clip(K)), written out for parity with numba
+        K = np.clip(np.asarray(K, dtype=float), breakpoints[0], breakpoints[-1])
+        i = np.clip(np.searchsorted(breakpoints, K, side='right') - 1, 0, len(breakpoints) - 2)
+        dx = K - breakpoints[i]
+        return ((coeffs[0, i] * dx + coeffs[1, i]) * dx + coeffs[2, i]) * dx + coeffs[3, i]
+
+
+if numba is not None:
+    _INV_SQRT_2PI = 1.0 / math.sqrt(2.0 * math.pi)
+
+    @numba.njit(cache=True, error_model='numpy')
+    def _ncdf(x):
+        return 0.5 * math.erfc(-x / math.sqrt(2.0))
+
+    @numba.njit(cache=True, error_model='numpy')
+    def _d1_scalar(F, K, sigma, T):
+        if T <= 0.0 or sigma <= 0.0:
+            return 0.0
+        return (math.log(F / K) + 0.5 * sigma * sigma * T) / (sigma * math.sqrt(T))
+
+    # Element-wise kernels compiled as ufuncs: NumPy broadcasts their inputs in
+    # place (a scalar market against a strike array stays a scalar, no copies)
+    # and allocates only the output.
+    _MARKET_SIG = 'float64(float64, float64, float64, float64)'
+
+    @numba.vectorize([_MARKET_SIG], cache=True)
+    def _d1_ufunc(F, K, sigma, T):
+        return _d1_scalar(F, K, sigma, T)
+
+    @numba.vectorize([_MARKET_SIG], cache=True)
+    def _d2_ufunc(F, K, sigma, T):
+        return _d1_scalar(F, K, sigma, T) - sigma * math.sqrt(T) if T >= 0.0 else math.nan
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, float64, boolean)'], cache=True)
+    def _price_ufunc(F, K, sigma, T, rd, is_call):
+        d_1 = _d1_scalar(F, K, sigma, T)
+        d_2 = d_1 - sigma * math.sqrt(T) if T >= 0.0 else math.nan
+        df = math.exp(-rd * T)
+        if is_call:
+            return df * (F * _ncdf(d_1) - K * _ncdf(d_2))
+        return df * (K * _ncdf(-d_2) - F * _ncdf(-d_1))
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, float64, boolean)'], cache=True)
+    def _delta_ufunc(F, K, sigma, T, rf, is_call):
+        n1 = _ncdf(_d1_scalar(F, K, sigma, T))
+        return math.exp(-rf * T) * (n1 if is_call else n1 - 1.0)
+
+    @numba.vectorize(['float64(float64, float64, float64, float64, float64, float64)'], cache=True)
+    def _vega_ufunc(S, F, K, sigma, T, rf):
+        d_1 = _d1_scalar(F, K, sigma, T)
+        t = max(T, 0.0)
+        return S * math.exp(-rf * t) * math.sqrt(t) * math.exp(-0.5 * d_1 * d_1) * _INV_SQRT_2PI
+
+    @numba.njit(cache=True, error_model='numpy')
+    def _spline_kernel(K, x, c, out):
+        n = x.shape[0]
+        for i in range(out.shape[0]):
+            k = min(max(K[i], x[0]), x[n - 1])
+            j = np.searchsorted(x, k, side='right') - 1
+            j = min(max(j, 0), n - 2)
+            dx = k - x[j]
+            out[i] = ((c[0, j] * dx + c[1, j]) * dx + c[2, j]) * dx + c[3, j]
+
+
+class NumbaBackend:
+    name = 'numba'
+
+    @staticmethod
+    def _run(ufunc, *args):
+        # Expired / zero-vol entries produce inf and nan like the numpy path, without warnings
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return ufunc(*args)
+
+    @classmethod
+    def d1(cls, F, K, sigma, T):
+        return cls._run(_d1_ufunc, F, K, sigma, T)
+
+    @classmethod
+    def d2(cls, F, K, sigma, T):
+        return cls._run(_d2_ufunc, F, K, sigma, T)
+
+    @classmethod
+    def price(cls, F, K, sigma, T, rd, is_call):
+        return cls._run(_price_ufunc, F, K, sigma, T, rd, bool(is_call))
+
+    @classmethod
+    def delta(cls, F, K, sigma, T, rf, is_call):
+        return cls._run(_delta_ufunc, F, K, sigma, T, rf, bool(is_call))
+
+    @classmethod
+    def vega(cls, S, F, K, sigma, T, rf):
+        return cls._run(_vega_ufunc, S, F, K, sigma, T, rf)
+
+    @staticmethod
+    def spline_vol(K, breakpoints, coeffs):
+        K = np.asarray(K, dtype=np.float64)
+        out = np.empty(K.size)
+        _spline_kernel(np.ascontiguousarray(K).ravel(), np.ascontiguousarray(breakpoints, dtype=np.float64),
+                       np.ascontiguousarray(coeffs, dtype=np.float64), out)
+        return out.reshape(K.shape)
+
+
+BACKENDS = {'numpy': NumpyBackend}
+if numba is not None:
+    BACKENDS['numba'] = NumbaBackend
+
+
+def available_backends():
+    return list(BACKENDS)
+
+
+def _resolve(name):
+    if name in (None, 'auto'):
+        return BACKENDS.get('numba', NumpyBackend)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown or unavailable backend: {name}")
+    return BACKENDS[name]
+
+
+_active = _resolve(os.environ.get('PRICER_BACKEND', 'auto'))
+
+
+def get_backend():
+    return _active
+
+
+def warmup(backend=None):
+    # Run every kernel once on tiny inputs so JIT compilation (or loading the
+    # on-disk numba cache) happens at startup rather than inside a request
+    backend = backend or _active
+    one = np.ones(2)
+    backend.d1(one, one, one, one)
+    backend.d2(one, one, one, one)
+    for is_call in (True, False):
+        backend.price(one, one, one, one, one, is_call)
+        backend.delta(one, one, one, one, one, is_call)
+    backend.vega(1.0, one, one, one, one, one)
+    backend.spline_vol(one, np.array([0.0, 1.0, 2.0]), np.zeros((4, 2)))
+
+
+def set_backend(name):
+    # name: 'numpy', 'numba' or 'auto'; returns the backend now in use
+    global _active
+    _active = _resolve(name)
+    return _active
@@ -0,0 +1,192 @@
+import argparse
+import json
+import sys
+import timeit
+import tracemalloc
+import numpy as np
+import backends
+from pricing import VanillaFxOptionPricer, VolatilitySurface, price_structure
+from context import PricingContext
+from density import implied_distribution, strike_grid
+
+# Micro benchmarks for the pricing library.
+#
+#   python bench.py                # every suite
+#   python bench.py smile --json   # one suite, machine readable
+#
+# Each suite returns a flat dict of timings so runs can be compared.
+
+MARKET = (1.08, 0.04, 1.09, 0.5)
+QUOTES = (0.08, -0.005, 0.002, -0.01, 0.006)
+
+SUITES = {}
+
+
+def suite(fn):
+    SUITES[fn.__name__.replace('bench_', '')] = fn
+    return fn
+
+
+def best_of(stmt, number, repeat=5):
+    # Best per-call time in microseconds
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number * 1e6
+
+
+def peak_kb(fn):
+    # Peak traced allocation of one call (NumPy buffers are traced too)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024.0
+    finally:
+        tracemalloc.stop()
+
+
+@suite
+def bench_smile(n_strikes=10_000):
+    # Spline vs closed-form Vanna-Volga: construction and lookup throughput
+    pricer = VanillaFxOptionPricer(*MARKET)
+    ks = np.linspace(0.9, 1.3, n_strikes)
+    results = {}
+
+    for model in ('spline', 'vanna_volga'):
+        def build():
+            surface = VolatilitySurface(*QUOTES, model=model)
+            surface.construct_smile(pricer)
+            return surface
+        surface = build()
+        scalar_ks = ks[:1000].tolist()
+
+        results[f'{model}_construct_us'] = best_of(build, 200)
+        results[f'{model}_scalar_lookups_per_s'] = 1e6 / best_of(
+            lambda: [surface.get_vol(k) for k in scalar_ks], 5) * len(scalar_ks)
+        results[f'{model}_array_lookups_per_s'] = 1e6 / best_of(lambda: surface.get_vol(ks), 20) * n_strikes
+    return results
+
+
+@suite
+def bench_backend(n=1_000_000):
+    # Large-batch kernels per compute backend (price + delta + vega + spline lookup)
+    rng = np.random.default_rng(0)
+    T = rng.uniform(0.05, 2.0, n)
+    F = rng.uniform(1.0, 1.2, n)
+    K = F * rng.uniform(0.8, 1.2, n)
+    sigma = rng.uniform(0.05, 0.2, n)
+    rd = np.full(n, 0.03)
+
+    pricer = VanillaFxOptionPricer(*MARKET)
+    surface = VolatilitySurface(*QUOTES)
+    surface.construct_smile(pricer)
+    x, c = surface.spline.x, surface.spline.c
+
+    # Array market per option (a book) and scalar market against an array of strikes
+    # (a chain, the plotted curve, the density grid)
+    strikes = np.linspace(0.8, 1.2, n)
+    cases = {
+        'book': ((F, K, sigma, T, rd), K),
+        'chain': ((1.09, strikes, 0.1, 0.5, 0.03), strikes),
+    }
+
+    results = {}
+    for name in backends.available_backends():
+        backend = backends.BACKENDS[name]
+        backends.warmup(backend)
+        for case, ((f, k, s, t, r), ks) in cases.items():
+            prefix = f'{name}_{case}'
+            results[f'{prefix}_price_ms'] = best_of(lambda: backend.price(f, k, s, t, r, True), 3) / 1e3
+            results[f'{prefix}_delta_ms'] = best_of(lambda: backend.delta(f, k, s, t, r, True), 3) / 1e3
+            results[f'{prefix}_vega_ms'] = best_of(lambda: backend.vega(1.1, f, k, s, t, r), 3) / 1e3
+            results[f'{prefix}_price_peak_kb'] = peak_kb(lambda: backend.price(f, k, s, t, r, True))
+        results[f'{name}_spline_vol_ms'] = best_of(lambda: backend.spline_vol(K, x, c), 3) / 1e3
+    if 'numba' in backends.BACKENDS:
+        for case in cases:
+            for kernel in ('price', 'delta', 'vega'):
+                results[f'numba_{case}_{kernel}_speedup'] = (
+                    results[f'numpy_{case}_{kernel}_ms'] / results[f'numba_{case}_{kernel}_ms']
+                )
+            results[f'numba_{case}_price_peak_reduction'] = (
+                results[f'numpy_{case}_price_peak_kb'] / results[f'numba_{case}_price_peak_kb']
+            )
+        results['numba_spline_vol_speedup'] = results['numpy_spline_vol_ms'] / results['numba_spline_vol_ms']
+    return results
+
+
+@suite
+def bench_density(n_strikes=401):
+    # Digitals + density on a strike grid: analytic pass vs finite differences of get_vol + price
+    pricer = VanillaFxOptionPricer(*MARKET)
+    results = {}
+    for model in ('spline', 'vanna_volga'):
+        surface = VolatilitySurface(*QUOTES, model=model)
+        surface.construct_smile(pricer)
+        ks = strike_grid(pricer, surface, n_strikes)
+
+        def finite_differences(h=1e-4):
+            call = [pricer.price(surface.get_vol(k), k, 'call') for k in (ks - h, ks, ks + h)]
+            return (call[0] - call[2]) / (2 * h), (call[0] - 2 * call[1] + call[2]) / h**2
+
+        results[f'{model}_analytic_us'] = best_of(lambda: implied_distribution(pricer, surface, ks), 200)
+        results[f'{model}_finite_diff_us'] = best_of(finite_differences, 200)
+        results[f'{model}_speedup'] = results[f'{model}_finite_diff_us'] / results[f'{model}_analytic_us']
+    return results
+
+
+@suite
+def bench_request(strike=1.1):
+    # One /calculate worth of pricing work (smile, price, curve, payoff, model vegas):
+    # fresh objects per request vs a reused PricingContext. Peaks are per request, warm.
+    def fresh():
+        pricer = VanillaFxOptionPricer(*MARKET)
+        surface = VolatilitySurface(*QUOTES)
+        surface.construct_smile(pricer)
+        price, vol, K, _ = price_structure(pricer, surface, 'call', 'price', strike)
+        curve_x = np.linspace(surface.strikes[0] * 0.8, surface.strikes[-1] * 1.2, 50)
+        surface.get_vol(curve_x)
+        np.maximum(curve_x - K, 0)
+        pricer.calculate_vega(K, vol)
+        pricer.calculate_model_sensitivities(K, 'call', surface)
+
+    context = PricingContext()
+
+    def reused():
+        pricer, surface = context.load(*MARKET, *QUOTES)
+        price, vol, K, _ = price_structure(pricer, surface, 'call', 'price', strike)
+        curve_x = context.curve_strikes(surface.strikes[0] * 0.8, surface.strikes[-1] * 1.2)
+        surface.get_vol(curve_x)
+        context.payoff('call', K, None, curve_x)
+        pricer.calculate_vega(K, vol)
+        context.model_sensitivities(pricer, surface, K, 'call')
+
+    results = {}
+    for name, fn in (('fresh', fresh), ('context', reused)):
+        fn()
+        results[f'{name}_us'] = best_of(fn, 200)
+        results[f'{name}_peak_kb'] = peak_kb(fn)
+    results['speedup'] = results['fresh_us'] / results['context_us']
+    results['peak_reduction'] = results['fresh_peak_kb'] / results['context_peak_kb']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pricing micro benchmarks")
+    parser.add_argument('suites', nargs='*', help=f"Suites to run: {', '.join(SUITES)} (default: all)")
+    parser.add_argument('--json', action='store_true', help="Emit one JSON document")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+
+    report = {name: SUITES[name]() for name in (args.suites or SUITES)}
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+    else:
+        for name, results in report.items():
+            print(f"[{name}]")
+            for key, value in results.items():
+                print(f"  {key:40s} {value:>14,.2f}")
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import queue
+from contextlib import contextmanager
+import numpy as np
+from pricing import VanillaFxOptionPricer, VolatilitySurface, structure_legs
+
+# Reusable per-worker state for single-structure requests (/calculate).
+#
+# A PricingContext owns one pricer, one base smile, one scratch smile for the
+# model-vega bumps and the fixed-size work arrays of the plot data. Each
+# request re-points them at its market (load) instead of allocating a pricer,
+# six surfaces and fresh arrays. Arrays handed out (curve_x, payoff_y) are
+# overwritten by the next request on the same context, so encode the response
+# before reusing it. Contexts are not thread safe: borrow one from a
+# ContextPool for the duration of a request and give it back afterwards.
+
+# Quote bumped for each model vega, as in calculate_model_sensitivities
+SENSITIVITY_QUOTES = (
+    ('atm', 'atm_vol', 'sigma_atm'),
+    ('rr25', 'rr_25', 'rr_25'),
+    ('st25', 'st_25', 'st_25'),
+    ('rr10', 'rr_10', 'rr_10'),
+    ('st10', 'st_10', 'st_10'),
+)
+BUMP = 0.0001
+
+
+class PricingContext:
+    __slots__ = ('pricer', 'surface', 'bumped', 'curve_x', 'payoff_y', '_steps', '_work', 'requests')
+
+    def __init__(self, n_curve=50):
+        self.pricer = VanillaFxOptionPricer(1.0, 0.0, 1.0, 1.0)
+        self.surface = VolatilitySurface(0.1, 0.0, 0.0, 0.0, 0.0)
+        self.bumped = VolatilitySurface(0.1, 0.0, 0.0, 0.0, 0.0)
+        self._steps = np.arange(n_curve, dtype=float)
+        self._work = np.empty(n_curve)
+        self.curve_x = np.empty(n_curve)
+        self.payoff_y = np.empty(n_curve)
+        self.requests = 0
+
+    def load(self, spot, rd, forward, T, atm, rr25, st25, rr10, st10, model='spline'):
+        # Market for the next request, built into the context's own pricer and smile
+        self.requests += 1
+        self.pricer.reset(spot, rd, forward, T)
+        self.surface.reset(atm, rr25, st25, rr10, st10, model)
+        self.surface.construct_smile(self.pricer)
+        return self.pricer, self.surface
+
+    def model_sensitivities(self, pricer, surface, strike, option_type):
+        # Same result as pricer.calculate_model_sensitivities(strike, option_type, surface),
+        # but every bump starts from a copy of surface in the one scratch smile and
+        # re-solves only the knots fed by the bumped quote. surface is not modified.
+        base_price = pricer.price(surface.get_vol(strike), strike, option_type)
+        results = {}
+        for name, quote, attr in SENSITIVITY_QUOTES:
+            self.bumped.assign(surface)
+            self.bumped.update_quotes(pricer, **{quote: getattr(surface, attr) + BUMP})
+            bumped_price = pricer.price(self.bumped.get_vol(strike), strike, option_type)
+            results[name] = (bumped_price - base_price) / BUMP
+        return results
+
+    def curve_strikes(self, lo, hi):
+        # np.linspace(lo, hi, n) written into curve_x (same arithmetic, same values)
+        n = len(self._steps)
+        np.multiply(self._steps, (hi - lo) / (n - 1), out=self.curve_x)
+        self.curve_x += lo
+        self.curve_x[-1] = hi
+        return self.curve_x
+
+    def payoff(self, structure, strike, strike_2, spots):
+        # Payoff at maturity over spots (same length as curve_x) into payoff_y;
+        # unknown structures pay nothing
+        out = self.payoff_y
+        out.fill(0.0)
+        if structure not in ('call', 'put', 'strangle', 'risk_reversal'):
+            return out
+        work = self._work
+        for sign, option_type, K in structure_legs(structure, strike, strike_2):
+            if option_type == 'call':
+                np.subtract(spots, K, out=work)
+            else:
+                np.subtract(K, spots, out=work)
+            np.maximum(work, 0.0, out=work)
+            if sign > 0:
+                out += work
+            else:
+                out -= work
+        return out
+
+
+class ContextPool:
+    # Idle PricingContexts, handed out most recently used first. Reuse does not
+    # depend on the server's threading model (werkzeug starts a thread per
+    # connection); a context is created only when every idle one is borrowed.
+    # At most max_idle are kept, extras are dropped on release.
+    def __init__(self, max_idle=32, n_curve=50):
+        self.n_curve = n_curve
+        self.created = 0
+        self._idle = queue.LifoQueue(maxsize=max_idle)
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            self.created += 1
+            return PricingContext(self.n_curve)
+
+    def release(self, context):
+        try:
+            self._idle.put_nowait(context)
+        except queue.Full:
+            pass
+
+    @contextmanager
+    def borrow(self):
+        context = self.acquire()
+        try:
+            yield context
+        finally:
+            self.release(context)
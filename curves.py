@@ -0,0 +1,76 @@
+import numpy as np
+
+# Discount curves for the domestic and foreign legs.
+# Pillars are stored as log discount factors, interpolated linearly in time
+# (i.e. piecewise-flat instantaneous forwards) and extrapolated at the last
+# pillar's zero rate. All queries take scalars or arrays of maturities.
+
+class YieldCurve:
+    def __init__(self, times, zero_rates):
+        # times: pillar maturities in years (> 0), zero_rates: continuously compounded
+        times = np.asarray(times, dtype=float)
+        zero_rates = np.broadcast_to(np.asarray(zero_rates, dtype=float), times.shape)
+        if times.ndim != 1 or len(times) == 0:
+            raise ValueError("Curve needs at least one pillar")
+        if np.any(times <= 0):
+            raise ValueError("Pillar times must be positive")
+
+        order = np.argsort(times)
+        self.times = times[order]
+        self.zero_rates = zero_rates[order]
+
+        # Precomputed once, every query below is a single np.interp over these
+        # Anchored at t=0 where log DF = 0
+        self._t = np.concatenate(([0.0], self.times))
+        self._log_df = np.concatenate(([0.0], -self.zero_rates * self.times))
+
+    @classmethod
+    def flat(cls, rate):
+        return cls([1.0], [rate])
+
+    @classmethod
+    def from_discount_factors(cls, times, discount_factors):
+        times = np.asarray(times, dtype=float)
+        return cls(times, -np.log(np.asarray(discount_factors, dtype=float)) / times)
+
+    @classmethod
+    def from_forward_points(cls, spot, times, forward_points, domestic_curve, points_scale=1.0):
+        # Implied foreign curve from outright forwards F = S + points * scale
+        # (e.g. points_scale=1e-4 for EURUSD pips). Covered interest parity:
+        # DF_f(T) = DF_d(T) * F(T) / S
+        times = np.asarray(times, dtype=float)
+        forwards = float(spot) + np.asarray(forward_points, dtype=float) * points_scale
+        log_df_f = domestic_curve.log_discount(times) + np.log(forwards / float(spot))
+        return cls(times, -log_df_f / times)
+
+    def log_discount(self, T):
+        T = np.asarray(T, dtype=float)
+        log_df = np.interp(T, self._t, self._log_df)
+        # Flat zero-rate extrapolation past the last pillar
+        beyond = T > self.times[-1]
+        if np.any(beyond):
+            log_df = np.where(beyond, -self.zero_rates[-1] * T, log_df)
+        return log_df if log_df.ndim else float(log_df)
+
+    def discount_factor(self, T):
+        return np.exp(self.log_discount(T))
+
+    def zero_rate(self, T):
+        # Short end (T -> 0) takes the first pillar's rate
+        T = np.asarray(T, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(T > 0, -np.asarray(self.log_discount(T)) / T, self.zero_rates[0])
+        return rates if rates.ndim else float(rates)
+
+    def forward_rate(self, T1, T2):
+        # Continuously compounded forward rate between T1 and T2
+        T1 = np.asarray(T1, dtype=float)
+        T2 = np.asarray(T2, dtype=float)
+        return (np.asarray(self.log_discount(T1)) - self.log_discount(T2)) / (T2 - T1)
+
+def fx_forward(spot, domestic_curve, foreign_curve, T):
+    # Outright forward(s) F(T) = S * DF_f(T) / DF_d(T)
+    forward = float(spot) * np.exp(
+        np.asarray(foreign_curve.log_discount(T)) - domestic_curve.log_discount(T)
+    )
+    return forward if forward.ndim else float(forward)
@@ -0,0 +1,258 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import numpy as np
+
+# Load generator for the /calculate endpoint.
+#
+#   python loadtest.py --concurrency 1,4,16 --requests 400 --mix delta=0.5,strangle=0.3,risk_reversal=0.2
+#
+# Without --url an instance of app.py is started in a separate interpreter on a
+# free port, so the server does not share a GIL with the load generator threads.
+# --in-process serves it from a thread of this process instead (as the tests do).
+# Results are printed (or written with --output) as JSON, one entry per
+# concurrency level, so runs can be diffed or plotted.
+
+DEFAULT_MIX = {'price': 0.4, 'delta': 0.3, 'strangle': 0.15, 'risk_reversal': 0.15}
+
+
+def parse_mix(text):
+    # "delta=0.5,strangle=0.5" -> normalized weights
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Unknown scenario: {name}")
+        mix[name] = float(weight) if weight else 1.0
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError("Mix weights must sum to a positive number")
+    return {name: w / total for name, w in mix.items()}
+
+
+def make_payload(scenario, rng):
+    # Randomized but realistic market data around a G10 pair
+    spot = rng.uniform(0.8, 1.5)
+    T = rng.choice([1 / 52, 1 / 12, 0.25, 0.5, 1.0, 2.0])
+    rd = rng.uniform(0.0, 0.05)
+    rf = rng.uniform(0.0, 0.05)
+    atm = rng.uniform(0.05, 0.15)
+    payload = {
+        'spot_ref': spot, 'rd': rd, 'forward': spot * np.exp((rd - rf) * T), 'T': T,
+        'atm': atm,
+        'rr25': rng.uniform(-0.02, 0.02), 'st25': rng.uniform(0.0, 0.006),
+        'rr10': rng.uniform(-0.04, 0.04), 'st10': rng.uniform(0.0, 0.02),
+    }
+    if scenario == 'price':
+        payload.update(type=rng.choice(['call', 'put']), strike_type='price',
+                       strike=payload['forward'] * rng.uniform(0.9, 1.1))
+    elif scenario == 'delta':
+        payload.update(type=rng.choice(['call', 'put']), strike_type='delta',
+                       strike=rng.choice([0.10, 0.25, 0.50]))
+    else:
+        payload.update(type=scenario, strike_type='delta', strike=rng.choice([0.10, 0.25]))
+    return payload
+
+
+def build_requests(mix, n, seed):
+    # Pre-generate the whole request stream so every concurrency level replays the same mix
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    scenarios = rng.choices(names, weights=weights, k=n)
+    return [(s, json.dumps(make_payload(s, rng)).encode()) for s in scenarios]
+
+
+def summarize(latencies):
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'mean_ms': None, 'max_ms': None}
+    ms = np.asarray(latencies) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99, 'mean_ms': ms.mean(), 'max_ms': ms.max()}
+
+
+def run_level(url, requests, concurrency, timeout=30.0):
+    parts = urlsplit(url)
+    path = (parts.path.rstrip('/') or '') + '/calculate'
+    cursor = iter(range(len(requests)))
+    lock = threading.Lock()
+    samples = []  # (scenario, latency seconds, ok)
+
+    def worker():
+        # One persistent connection per worker thread
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        local = []
+        try:
+            while True:
+                with lock:
+                    i = next(cursor, None)
+                if i is None:
+                    break
+                scenario, body = requests[i]
+                start = time.perf_counter()
+                try:
+                    conn.request('POST', path, body=body, headers={'Content-Type': 'application/json'})
+                    response = conn.getresponse()
+                    data = response.read()
+                    ok = response.status == 200 and json.loads(data).get('success', False)
+                except (OSError, http.client.HTTPException, ValueError):
+                    ok = False
+                    conn.close()
+                    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+                local.append((scenario, time.perf_counter() - start, ok))
+        finally:
+            conn.close()
+        return local
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for result in [pool.submit(worker) for _ in range(concurrency)]:
+            samples.extend(result.result())
+    elapsed = time.perf_counter() - start
+
+    errors = sum(1 for _, _, ok in samples if not ok)
+    level = {
+        'concurrency': concurrency,
+        'requests': len(samples),
+        'elapsed_s': elapsed,
+        'throughput_rps': len(samples) / elapsed if elapsed > 0 else None,
+        'error_rate': errors / len(samples) if samples else None,
+        # Latency percentiles cover successful requests only
+        **summarize([lat for _, lat, ok in samples if ok]),
+        'by_scenario': {},
+    }
+    for scenario in sorted({s for s, _, _ in samples}):
+        rows = [(lat, ok) for s, lat, ok in samples if s == scenario]
+        level['by_scenario'][scenario] = {
+            'requests': len(rows),
+            'error_rate': sum(1 for _, ok in rows if not ok) / len(rows),
+            **summarize([lat for lat, ok in rows if ok]),
+        }
+    return level
+
+
+def make_quiet_server(host='127.0.0.1', port=0):
+    # Threaded werkzeug server for app.py without per-request access logging
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        # Per-request access logging would dominate the measured latency
+        def log_request(self, *args, **kwargs):
+            pass
+
+    return make_server(host, port, app, threaded=True, request_handler=QuietHandler)
+
+
+class LocalServer:
+    # Serves app.py from a background thread on an ephemeral port
+    def __init__(self, host='127.0.0.1', port=0):
+        self.server = make_quiet_server(host, port)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self.server.host}:{self.server.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.thread.join()
+
+
+# Run by ServerProcess in the child interpreter; the port line tells the parent it is listening
+_SERVE = (
+    "import sys\n"
+    "from loadtest import make_quiet_server\n"
+    "server = make_quiet_server(sys.argv[1], int(sys.argv[2]))\n"
+    "print('LISTENING', server.port, flush=True)\n"
+    "server.serve_forever()\n"
+)
+
+
+class ServerProcess:
+    # Serves app.py from a separate Python process on an ephemeral port
+    def __init__(self, host='127.0.0.1', port=0):
+        self.host = host
+        self.port = port
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', _SERVE, self.host, str(self.port)],
+            stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        for line in self.process.stdout:
+            if line.startswith('LISTENING '):
+                self.port = int(line.split()[1])
+                return self
+        self.process.wait()
+        raise RuntimeError(f"app.py server exited during startup (code {self.process.returncode})")
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        self.process.wait()
+        self.process.stdout.close()
+
+
+def run(url, mix, concurrency_levels, n_requests, seed=0, warmup=20):
+    requests = build_requests(mix, n_requests, seed)
+    if warmup:
+        run_level(url, requests[:warmup], 1)
+    return {
+        'url': url,
+        'mix': mix,
+        'seed': seed,
+        'levels': [run_level(url, requests, c) for c in concurrency_levels],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the /calculate endpoint")
+    parser.add_argument('--url', help="Base URL of a running instance (default: start app.py in a subprocess)")
+    parser.add_argument('--in-process', action='store_true',
+                        help="Serve app.py from a thread of the load generator instead of a subprocess")
+    parser.add_argument('--concurrency', default='1,4,16', help="Comma separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=500, help="Requests per concurrency level")
+    parser.add_argument('--mix', default=None, help="Scenario weights, e.g. price=0.4,delta=0.3,strangle=0.3")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    levels = [int(c) for c in args.concurrency.split(',')]
+
+    if args.url:
+        report = run(args.url, mix, levels, args.requests, args.seed, args.warmup)
+    else:
+        with (LocalServer() if args.in_process else ServerProcess()) as server:
+            report = run(server.url, mix, levels, args.requests, args.seed, args.warmup)
+
+    text = json.dumps(report, indent=2, default=float)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import threading
+import time
+from types import MappingProxyType
+from pricing import VanillaFxOptionPricer, VolatilitySurface, MARKET_FIELDS
+
+# Shared, versioned market state keyed by currency pair.
+#
+# Every publish builds a complete MarketSnapshot (pricer + constructed smile)
+# outside any lock, then swaps in a new {pair: history} mapping with a single
+# reference assignment. Readers only ever load that reference, so they never
+# block and always see a whole snapshot. Writers serialize on one lock among
+# themselves. Snapshots are never mutated after publication: their surface
+# must not be passed to update_quotes, publish a new snapshot instead.
+
+
+class MarketSnapshot:
+    __slots__ = ('pair', 'version', 'published_at', 'market', 'pricer', 'surface')
+
+    def __init__(self, pair, version, market, pricer, surface):
+        for name, value in (('pair', pair), ('version', version), ('published_at', time.time()),
+                            ('market', MappingProxyType(dict(market))),
+                            ('pricer', pricer), ('surface', surface)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("MarketSnapshot is immutable")
+
+    def __repr__(self):
+        return f"MarketSnapshot({self.pair!r}, version={self.version})"
+
+    def describe(self):
+        # JSON friendly summary
+        return {
+            'pair': self.pair,
+            'version': self.version,
+            'published_at': self.published_at,
+            'market': dict(self.market),
+            'smile_model': self.surface.model,
+            'knot_strikes': list(self.surface.strikes),
+            'knot_vols': list(self.surface.vols),
+        }
+
+
+def build_snapshot_parts(market):
+    # Pricer and constructed smile from MARKET_FIELDS (+ optional smile_model)
+    missing = [f for f in MARKET_FIELDS if f not in market]
+    if missing:
+        raise ValueError(f"Missing market fields: {', '.join(missing)}")
+    values = {f: float(market[f]) for f in MARKET_FIELDS}
+    values['smile_model'] = market.get('smile_model', 'spline')
+
+    pricer = VanillaFxOptionPricer(values['spot_ref'], values['rd'], values['forward'], values['T'])
+    surface = VolatilitySurface(values['atm'], values['rr25'], values['st25'], values['rr10'], values['st10'],
+                                model=values['smile_model'])
+    surface.construct_smile(pricer)
+    return values, pricer, surface
+
+
+class MarketRegistry:
+    def __init__(self, history=16):
+        # Older versions beyond `history` per pair are dropped on publish
+        self.history = history
+        self._state = {}  # pair -> tuple of snapshots, oldest first; replaced, never mutated
+        self._write_lock = threading.Lock()
+
+    def publish(self, pair, market):
+        # Build first (slow, lock free), then install atomically
+        values, pricer, surface = build_snapshot_parts(market)
+        with self._write_lock:
+            versions = self._state.get(pair, ())
+            version = versions[-1].version + 1 if versions else 1
+            snapshot = MarketSnapshot(pair, version, values, pricer, surface)
+            state = dict(self._state)
+            state[pair] = (versions + (snapshot,))[-self.history:]
+            self._state = state
+        return snapshot
+
+    def get(self, pair, version=None):
+        # Lock free: one read of the current mapping
+        versions = self._state.get(pair)
+        if not versions:
+            raise ValueError(f"No market data published for {pair}")
+        if version is None:
+            return versions[-1]
+        version = int(version)
+        for snapshot in versions:
+            if snapshot.version == version:
+                return snapshot
+        raise ValueError(f"Version {version} of {pair} is not available")
+
+    def versions(self, pair):
+        return [s.version for s in self._state.get(pair, ())]
+
+    def pairs(self):
+        return sorted(self._state)
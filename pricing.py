@@ -1,23 +1,58 @@
 
+import math
+from bisect import bisect_right
 import numpy as np
-from scipy.stats import norm
+from scipy.special import ndtr, ndtri
 from scipy.optimize import brentq
-from scipy.interpolate import CubicSpline
+from scipy.interpolate import PPoly
+from backends import get_backend
+
+def _as_float(x):
+    # Scalars stay plain floats (fast path), anything array-like becomes a float ndarray
+    if np.ndim(x) == 0:
+        return float(x)
+    return np.asarray(x, dtype=float)
 
 class VanillaFxOptionPricer:
+    # rd, forward and T may be arrays of the same shape (one entry per expiry),
+    # in which case d1/d2/price/delta/vega broadcast over them. The strike
+    # solvers (get_delta_strike, solve_strike_for_delta) stay scalar.
     def __init__(self, spot, domestic_rate, forward_rate, time_to_maturity):
-        self.S = float(spot)
-        self.rd = float(domestic_rate)
-        self.F = float(forward_rate)
-        self.T = float(time_to_maturity)
         self.year_fraction = 365.0
+        self.reset(spot, domestic_rate, forward_rate, time_to_maturity)
+        
+    def reset(self, spot, domestic_rate, forward_rate, time_to_maturity):
+        # Re-point this pricer at a new market in place (see context.PricingContext)
+        self.S = float(spot)
+        self.rd = _as_float(domestic_rate)
+        self.F = _as_float(forward_rate)
+        self.T = _as_float(time_to_maturity)
+        
+        # Checked once here rather than on every scalar d1 / price call
+        self._scalar_market = np.ndim(self.T) == 0 and np.ndim(self.F) == 0
         
         # Derive rf for delta calculations
         # F = S * exp((rd - rf) * T) -> rf = rd - ln(F/S)/T
-        if self.T > 0 and self.S > 0 and self.F > 0:
-            self.rf = self.rd - np.log(self.F / self.S) / self.T
+        if self._scalar_market:
+            if self.T > 0 and self.S > 0 and self.F > 0:
+                self.rf = self.rd - np.log(self.F / self.S) / self.T
+            else:
+                self.rf = 0.0 # Fallback or handle standard expiration
         else:
-            self.rf = 0.0 # Fallback or handle standard expiration
+            live = (self.T > 0) & (self.S > 0) & (self.F > 0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                self.rf = np.where(live, self.rd - np.log(self.F / self.S) / self.T, 0.0)
+            
+    @classmethod
+    def from_curves(cls, spot, domestic_curve, foreign_curve, time_to_maturity):
+        # Build a (possibly multi-expiry) pricer from domestic/foreign curves,
+        # see curves.YieldCurve. rd is the domestic zero rate to each expiry and
+        # F = S * DF_f(T) / DF_d(T).
+        T = _as_float(time_to_maturity)
+        log_df_d = domestic_curve.log_discount(T)
+        log_df_f = foreign_curve.log_discount(T)
+        forward = float(spot) * np.exp(log_df_f - log_df_d)
+        return cls(spot, domestic_curve.zero_rate(T), forward, T)
             
     def copy(self):
         # Helper to clone pricer
@@ -26,18 +61,33 @@ class VanillaFxOptionPricer:
     def calculate_forward(self):
         return self.F
 
+    def _is_scalar(self, K, sigma):
+        # Scalars stay on the plain Python path (the strike solvers call it in a loop),
+        # anything array-valued goes through the active compute backend
+        # (floats, including numpy float64, short-circuit the np.ndim calls)
+        return (self._scalar_market
+                and (isinstance(K, float) or np.ndim(K) == 0)
+                and (isinstance(sigma, float) or np.ndim(sigma) == 0))
+
     def d1(self, K, sigma):
+        F = self.calculate_forward()
+        if not self._is_scalar(K, sigma):
+            # Expired or zero-vol entries get d1 = 0 like the scalar path
+            return get_backend().d1(F, K, sigma, self.T)
         if self.T <= 0 or sigma <= 0:
             return 0
-        F = self.calculate_forward()
         return (np.log(F / K) + 0.5 * sigma**2 * self.T) / (sigma * np.sqrt(self.T))
 
     def d2(self, K, sigma):
+        if not self._is_scalar(K, sigma):
+            return get_backend().d2(self.calculate_forward(), K, sigma, self.T)
         return self.d1(K, sigma) - sigma * np.sqrt(self.T)
 
     def calculate_vega(self, K, sigma):
         # BS Vega = S * exp(-rf*T) * sqrt(T) * N'(d1)
         # N'(d1) = (1/sqrt(2pi)) * exp(-d1^2 / 2)
+        if not self._is_scalar(K, sigma):
+            return get_backend().vega(self.S, self.calculate_forward(), K, sigma, self.T, self.rf)
         if self.T <= 0:
             return 0.0
         d_1 = self.d1(K, sigma)
@@ -48,34 +98,43 @@ class VanillaFxOptionPricer:
         # dV/dSigma = S * exp(-rf*T) * N'(d1) * sqrt(T)
         
         df_rf = np.exp(-self.rf * self.T)
-        # norm.pdf is N'
-        vega = self.S * df_rf * np.sqrt(self.T) * norm.pdf(d_1)
+        # N'(d1) written out, scipy.stats' argument handling costs more than the formula
+        vega = self.S * df_rf * np.sqrt(self.T) * math.exp(-0.5 * d_1**2) / math.sqrt(2.0 * math.pi)
         return vega
 
     def price(self, sigma, K, option_type='call'):
         F = self.calculate_forward()
+        is_call = option_type.lower() == 'call'
+        if not self._is_scalar(K, sigma):
+            return get_backend().price(F, K, sigma, self.T, self.rd, is_call)
+        
         d_1 = self.d1(K, sigma)
         d_2 = self.d2(K, sigma)
         
         df = np.exp(-self.rd * self.T)
         
-        if option_type.lower() == 'call':
-            return df * (F * norm.cdf(d_1) - K * norm.cdf(d_2))
+        # ndtr is the standard normal CDF without scipy.stats' per-call overhead
+        if is_call:
+            return df * (F * ndtr(d_1) - K * ndtr(d_2))
         else:
-            return df * (K * norm.cdf(-d_2) - F * norm.cdf(-d_1))
+            return df * (K * ndtr(-d_2) - F * ndtr(-d_1))
 
     def calculate_delta(self, K, sigma, option_type='call'):
         # Delta = dV/dS
         # Call Delta = exp(-rf*T) * N(d1)
         # Put Delta = exp(-rf*T) * (N(d1) - 1)
         # Note: This is "Spot Delta".
+        is_call = option_type.lower() == 'call'
+        if not self._is_scalar(K, sigma):
+            return get_backend().delta(self.calculate_forward(), K, sigma, self.T, self.rf, is_call)
+        
         d_1 = self.d1(K, sigma)
         df_rf = np.exp(-self.rf * self.T)
         
-        if option_type.lower() == 'call':
-            return df_rf * norm.cdf(d_1)
+        if is_call:
+            return df_rf * ndtr(d_1)
         else:
-            return df_rf * (norm.cdf(d_1) - 1.0)
+            return df_rf * (ndtr(d_1) - 1.0)
 
     def solve_strike_for_delta(self, target_delta, option_type, surface):
         # target_delta: e.g. 0.25
@@ -109,6 +168,34 @@ class VanillaFxOptionPricer:
             print(f"Solver failed: {e}")
             return None
 
+    def solve_strikes_for_deltas(self, target_deltas, option_type, surface, iterations=60):
+        # Vectorized solve_strike_for_delta for a whole ladder of (absolute) deltas.
+        # Bisection in log strike over the same [0.1 F, 5 F] bracket as brentq, all
+        # deltas at once; entries with no root in the bracket come back as NaN.
+        target = np.asarray(target_deltas, dtype=float)
+        if option_type.lower() == 'put':
+            target = -target # Standard definition: Put delta is negative
+        
+        F = self.calculate_forward()
+        lo = np.full(target.shape, np.log(F * 0.1))
+        hi = np.full(target.shape, np.log(F * 5.0))
+        
+        def objective(log_k):
+            K = np.exp(log_k)
+            return self.calculate_delta(K, surface.get_vol(K), option_type) - target
+        
+        f_lo = objective(lo)
+        bracketed = np.sign(f_lo) != np.sign(objective(hi))
+        for _ in range(iterations):
+            mid = 0.5 * (lo + hi)
+            f_mid = objective(mid)
+            left = np.sign(f_mid) == np.sign(f_lo)
+            lo = np.where(left, mid, lo)
+            f_lo = np.where(left, f_mid, f_lo)
+            hi = np.where(left, hi, mid)
+        
+        return np.where(bracketed, np.exp(0.5 * (lo + hi)), np.nan)
+
     def get_delta_strike(self, delta, sigma, option_type='call'):
         # Inverse delta to find strike
         # Delta_call = exp(-rf*T) * N(d1)
@@ -124,14 +211,14 @@ class VanillaFxOptionPricer:
              # delta = chk * N(d1) -> N(d1) = delta / chk
              target = delta / chk
              if target <= 0 or target >= 1: return None # Impossible
-             d1_val = norm.ppf(target)
+             d1_val = ndtri(target)  # = norm.ppf, without the scipy.stats argument handling
         else:
              # delta = chk * (N(d1) - 1) -> N(d1) = delta/chk + 1
              # NOTE: Put delta is usually quoted as negative, but input delta might be positive convention (e.g. 25 Delta Put = -0.25 actual delta).
              # Let's assume input delta is absolute value (e.g. 0.25).
              target = ( -delta ) / chk + 1
              if target <= 0 or target >= 1: return None
-             d1_val = norm.ppf(target)
+             d1_val = ndtri(target)
              
         # d1 = (ln(F/K) + 0.5*v^2*T) / (v*sqrt(T))
         # v*sqrt(T)*d1 = ln(F/K) + 0.5*v^2*T
@@ -143,112 +230,526 @@ class VanillaFxOptionPricer:
         K = self.calculate_forward() / np.exp(log_fk)
         return K
 
-    def calculate_model_sensitivities(self, target_strike, option_type, base_surface):
+    def build_bumped_surfaces(self, base_surface, epsilon=0.0001):
+        # One smile per quote (atm, rr25, st25, rr10, st10), bumped by epsilon and
+        # rebuilt against this pricer. Build once and pass to
+        # calculate_model_sensitivities when many strikes share the same smile.
+        base_quotes = {
+            'atm_vol': base_surface.sigma_atm,
+            'rr_25': base_surface.rr_25,
+            'st_25': base_surface.st_25,
+            'rr_10': base_surface.rr_10,
+            'st_10': base_surface.st_10
+        }
+        bumped = {}
+        for name, quote in (('atm', 'atm_vol'), ('rr25', 'rr_25'), ('st25', 'st_25'),
+                            ('rr10', 'rr_10'), ('st10', 'st_10')):
+            p_args = dict(base_quotes)
+            p_args[quote] += epsilon
+            new_surface = VolatilitySurface(**p_args, model=base_surface.model)
+            new_surface.construct_smile(self) # Need pricer to solve strikes
+            bumped[name] = new_surface
+        return bumped
+
+    def calculate_model_sensitivities(self, target_strike, option_type, base_surface, bumped=None, epsilon=0.0001):
         # Calculate sensitivity of Price to each of the 5 surface parameters
-        # atm, rr25, st25, rr10, st10
-        
-        params = [
-            ('atm', base_surface.sigma_atm),
-            ('rr25', base_surface.rr_25),
-            ('st25', base_surface.st_25),
-            ('rr10', base_surface.rr_10),
-            ('st10', base_surface.st_10)
-        ]
-        
-        results = {}
-        epsilon = 0.0001 # 1 basis point
+        # atm, rr25, st25, rr10, st10 (finite difference of 1 basis point).
+        # bumped: optional result of build_bumped_surfaces(base_surface, epsilon) to reuse.
+        if bumped is None:
+            bumped = self.build_bumped_surfaces(base_surface, epsilon)
         
         # Base Price
         # We need to get the vol for the target strike using the base surface
         base_vol = base_surface.get_vol(target_strike)
         base_price = self.price(base_vol, target_strike, option_type)
         
-        for name, value in params:
-            # Construct perturbed surface
-            p_args = {
-                'atm_vol': base_surface.sigma_atm,
-                'rr_25': base_surface.rr_25,
-                'st_25': base_surface.st_25,
-                'rr_10': base_surface.rr_10,
-                'st_10': base_surface.st_10
-            }
-            
-            # Bump parameter
-            if name == 'atm': p_args['atm_vol'] += epsilon
-            elif name == 'rr25': p_args['rr_25'] += epsilon
-            elif name == 'st25': p_args['st_25'] += epsilon
-            elif name == 'rr10': p_args['rr_10'] += epsilon
-            elif name == 'st10': p_args['st_10'] += epsilon
-            
-            # New Surface
-            new_surface = VolatilitySurface(
-                p_args['atm_vol'], p_args['rr_25'], p_args['st_25'], 
-                p_args['rr_10'], p_args['st_10']
-            )
-            new_surface.construct_smile(self) # Need pricer to solve strikes
-            
+        results = {}
+        for name, new_surface in bumped.items():
             # New Price
             new_vol = new_surface.get_vol(target_strike)
             new_price = self.price(new_vol, target_strike, option_type)
             
             # Sensitivity = dPrice / dParam
-            # Finite difference
-            sens = (new_price - base_price) / epsilon
-            results[name] = sens
+            results[name] = (new_price - base_price) / epsilon
             
         return results
 
+# Market fields of a /calculate payload, shared by the batch tools
+MARKET_FIELDS = ('spot_ref', 'rd', 'forward', 'T', 'atm', 'rr25', 'st25', 'rr10', 'st10')
+
+def structure_legs(structure, strike, strike_2=None):
+    # (sign, option type, strike) per leg, matching price_structure's conventions
+    if structure == 'strangle':
+        return [(1.0, 'put', strike), (1.0, 'call', strike_2)]
+    if structure == 'risk_reversal':
+        return [(-1.0, 'put', strike), (1.0, 'call', strike_2)]
+    return [(1.0, structure, strike)]
+
+def price_structure(pricer, surface, option_type, strike_type, strike_input, strike_2_input=None):
+    # Price a single leg, strangle or risk reversal off a constructed smile.
+    # strike_type 'delta' treats strike_input as an absolute delta (e.g. 0.25),
+    # otherwise strike_input / strike_2_input are the (low / high) strikes.
+    # Returns (price, vol, strike, strike_2); strike_2 is None for single legs.
+    
+    # Determine actual strike(s)
+    strike_2 = None # For Strangle by Price
+    if strike_2_input is None:
+        strike_2_input = strike_input # Fallback to same if missing
+    
+    if option_type == 'strangle':
+        if strike_type == 'delta':
+            # Symmetric Delta Strangle (e.g. 25 Delta -> 25d Put + 25d Call)
+            # Solve for Put Strike (Delta = -strike_input, or abs=strike_input)
+            k_put = pricer.solve_strike_for_delta(strike_input, 'put', surface)
+            k_call = pricer.solve_strike_for_delta(strike_input, 'call', surface)
+            
+            if k_put is None or k_call is None:
+                raise ValueError('Could not solve strikes for strangle delta')
+            
+            strike = k_put # We'll report both or just the first? Let's treat 'strike' as K_put and 'strike_2' as K_call for reporting
+            strike_2 = k_call
+            
+        else:
+            # Strangle by Price
+            # strike_input is Put Strike (K_low)
+            # Data should have strike_2 for Call Strike (K_high)
+            strike = strike_input
+            strike_2 = strike_2_input
+            
+        # Price Strangle = Price(Put, K_put) + Price(Call, K_call)
+        vol_put = surface.get_vol(strike)
+        vol_call = surface.get_vol(strike_2)
+        
+        p_put = pricer.price(vol_put, strike, 'put')
+        p_call = pricer.price(vol_call, strike_2, 'call')
+        
+        price = p_put + p_call
+        
+        # Weighted vol? Or average? 
+        # Usually return separate vols or just one representative. Let's return avg or list?
+        # Existing specific 'vol' field expects float. Let's return average for now or just vol_put.
+        interp_vol = (vol_put + vol_call) / 2.0 
+        
+    elif option_type == 'risk_reversal':
+        # Risk Reversal = Long Call (High K) - Short Put (Low K)
+        # Usually defined by Delta (e.g. 25 Delta RR = 25d Call - 25d Put)
+        
+        if strike_type == 'delta':
+            # Symmetric Delta (e.g. 25 Delta -> 25d Put + 25d Call)
+            # Solve for Put Strike (Delta = -strike_input)
+            # Solve for Call Strike (Delta = strike_input)
+            k_put = pricer.solve_strike_for_delta(strike_input, 'put', surface)
+            k_call = pricer.solve_strike_for_delta(strike_input, 'call', surface)
+            
+            if k_put is None or k_call is None:
+                raise ValueError('Could not solve strikes for RR delta')
+            
+            strike = k_put # Low Strike (Short Put)
+            strike_2 = k_call # High Strike (Long Call)
+            
+        else:
+            # RR by Price
+            # strike_input = Put Strike (K_low)
+            # strike_2_input = Call Strike (K_high)
+            strike = strike_input
+            strike_2 = strike_2_input
+        
+        # Price RR = Price(Call, K_call) - Price(Put, K_put)
+        vol_put = surface.get_vol(strike)
+        vol_call = surface.get_vol(strike_2)
+        
+        p_put = pricer.price(vol_put, strike, 'put')
+        p_call = pricer.price(vol_call, strike_2, 'call')
+        
+        price = p_call - p_put
+        
+        interp_vol = (vol_put + vol_call) / 2.0
+        
+    elif strike_type == 'delta':
+        # ... existing single leg delta logic ...
+        # strike_input is treated as delta (e.g. 0.25)
+        # Cap at reasonable values 0 < delta < 1
+        if strike_input <= 0 or strike_input >= 1:
+             raise ValueError('Delta must be between 0 and 1')
+             
+        solved_k = pricer.solve_strike_for_delta(strike_input, option_type, surface)
+        if solved_k is None:
+            raise ValueError('Could not solve strike for given delta')
+        strike = solved_k
+        interp_vol = surface.get_vol(strike)
+        price = pricer.price(interp_vol, strike, option_type)
+        
+    else:
+        # Single leg by Price
+        strike = strike_input
+        interp_vol = surface.get_vol(strike)
+        price = pricer.price(interp_vol, strike, option_type)
+        
+    return price, interp_vol, strike, strike_2
+
+def price_chain(pricer, surface, option_type='call', strikes=None, deltas=None, sensitivities=True):
+    # Whole option chain off one constructed smile, in vectorized form.
+    # Pass either strikes or (absolute) deltas; a delta ladder is solved for its
+    # strikes first. Returns a dict of arrays; model_vega bumps each of the five
+    # quotes once for the whole ladder rather than once per strike.
+    if (strikes is None) == (deltas is None):
+        raise ValueError('Pass exactly one of strikes or deltas')
+    
+    if deltas is not None:
+        deltas = np.asarray(deltas, dtype=float)
+        if np.any((deltas <= 0) | (deltas >= 1)):
+            raise ValueError('Delta must be between 0 and 1')
+        strikes = pricer.solve_strikes_for_deltas(deltas, option_type, surface)
+    strikes = np.asarray(strikes, dtype=float)
+    
+    # Unsolved deltas (NaN strikes) are carried through as NaN rows
+    solved = np.isfinite(strikes)
+    K = np.where(solved, strikes, pricer.calculate_forward())
+    vols = np.asarray(surface.get_vol(K), dtype=float)
+    
+    chain = {
+        'strike': strikes,
+        'vol': np.where(solved, vols, np.nan),
+        'price': np.where(solved, pricer.price(vols, K, option_type), np.nan),
+        'delta': np.where(solved, pricer.calculate_delta(K, vols, option_type), np.nan),
+        'vega': np.where(solved, pricer.calculate_vega(K, vols), np.nan),
+    }
+    if sensitivities:
+        chain['model_vega'] = {
+            name: np.where(solved, sens, np.nan)
+            for name, sens in pricer.calculate_model_sensitivities(K, option_type, surface).items()
+        }
+    return chain
+
+# Smile knots in strike order: (key, delta, option type, rr attr, st attr, rr sign)
+# The ATM knot carries no rr/st and is solved at 50 delta on the call side.
+SMILE_KNOTS = [
+    ('10p', 0.10, 'put', 'rr_10', 'st_10', -0.5),
+    ('25p', 0.25, 'put', 'rr_25', 'st_25', -0.5),
+    ('atm', 0.50, 'call', None, None, 0.0),
+    ('25c', 0.25, 'call', 'rr_25', 'st_25', 0.5),
+    ('10c', 0.10, 'call', 'rr_10', 'st_10', 0.5),
+]
+
+# Which knots have to be re-solved when a given quote changes.
+# ATM feeds every derived vol, the wing quotes only touch their own pillar.
+QUOTE_KNOTS = {
+    'atm_vol': ('10p', '25p', 'atm', '25c', '10c'),
+    'rr_25': ('25p', '25c'),
+    'st_25': ('25p', '25c'),
+    'rr_10': ('10p', '10c'),
+    'st_10': ('10p', '10c'),
+}
+
+def natural_spline_coefficients(x, y):
+    # Natural cubic spline through (x, y) in scipy PPoly layout:
+    # c[m, i] multiplies (K - x[i])**(3-m) on segment i.
+    # With the knot count fixed at 5 this is a 3x3 tridiagonal solve, far
+    # cheaper than building a CubicSpline object on every refit. It is done
+    # as a Thomas sweep on plain floats: the only array allocated is c itself.
+    x = [float(v) for v in x]
+    y = [float(v) for v in y]
+    n = len(x)
+    h = [x[i + 1] - x[i] for i in range(n - 1)]
+    slope = [(y[i + 1] - y[i]) / h[i] for i in range(n - 1)]
+    
+    # Second derivatives M, with M[0] = M[-1] = 0 (natural end conditions).
+    # Interior row i: h[i] M[i] + 2 (h[i] + h[i+1]) M[i+1] + h[i+1] M[i+2] = 6 (slope[i+1] - slope[i])
+    M = [0.0] * n
+    m = n - 2
+    if m > 0:
+        diag = [2.0 * (h[i] + h[i + 1]) for i in range(m)]
+        rhs = [6.0 * (slope[i + 1] - slope[i]) for i in range(m)]
+        for i in range(1, m):
+            w = h[i] / diag[i - 1]
+            diag[i] -= w * h[i]
+            rhs[i] -= w * rhs[i - 1]
+        M[m] = rhs[m - 1] / diag[m - 1]
+        for i in range(m - 2, -1, -1):
+            M[i + 1] = (rhs[i] - h[i + 1] * M[i + 2]) / diag[i]
+    
+    c = np.array([
+        [(M[i + 1] - M[i]) / (6.0 * h[i]) for i in range(n - 1)],
+        [0.5 * M[i] for i in range(n - 1)],
+        [slope[i] - h[i] * (2.0 * M[i] + M[i + 1]) / 6.0 for i in range(n - 1)],
+        y[:-1],
+    ])
+    return c
+
+# Floor for Vanna-Volga vols far out in the wings
+VV_MIN_VOL = 1e-4
+
+def _vanna_volga_terms(x, log_strikes, vols, log_forward, T):
+    # Plain arithmetic so it works on floats and arrays alike
+    x1, x2, x3 = log_strikes
+    s1, s2, s3 = vols
+    
+    # Lagrange weights in log strike
+    w1 = (x2 - x) * (x3 - x) / ((x2 - x1) * (x3 - x1))
+    w2 = (x - x1) * (x3 - x) / ((x2 - x1) * (x3 - x2))
+    w3 = (x - x1) * (x - x2) / ((x3 - x1) * (x3 - x2))
+    first_order = w1 * s1 + w2 * s2 + w3 * s3
+    
+    sq = s2 * math.sqrt(T)
+    def d1d2(xk):
+        d_1 = (log_forward - xk + 0.5 * sq**2) / sq
+        return d_1 * (d_1 - sq)
+    
+    D1 = first_order - s2
+    D2 = w1 * d1d2(x1) * (s1 - s2)**2 + w3 * d1d2(x3) * (s3 - s2)**2
+    dd = d1d2(x)
+    disc = s2**2 + dd * (2.0 * s2 * D1 + D2)
+    # d1*d2 -> 0 limit of the second-order expression
+    limit = s2 + D1 + D2 / (2.0 * s2)
+    return first_order, dd, disc, limit
+
+def vanna_volga_vol(K, log_strikes, vols, log_forward, T):
+    # Second-order Vanna-Volga smile (Castagna & Mercurio 2007) through the
+    # 25d put, ATM and 25d call pillars, evaluated in closed form over arrays.
+    # Falls back to the first-order (log-strike quadratic) approximation
+    # where the second-order square root has no real solution.
+    s2 = vols[1]
+    if np.ndim(K) == 0:
+        first_order, dd, disc, limit = _vanna_volga_terms(math.log(K), log_strikes, vols, log_forward, T)
+        if disc < 0:
+            vol = first_order
+        elif abs(dd) < 1e-12:
+            vol = limit
+        else:
+            vol = s2 + (math.sqrt(disc) - s2) / dd
+        return max(vol, VV_MIN_VOL)
+    
+    x = np.log(np.asarray(K, dtype=float))
+    first_order, dd, disc, limit = _vanna_volga_terms(x, log_strikes, vols, log_forward, T)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        second_order = s2 + (np.sqrt(disc) - s2) / dd
+    second_order = np.where(np.abs(dd) < 1e-12, limit, second_order)
+    vol = np.where(disc >= 0, second_order, first_order)
+    return np.maximum(vol, VV_MIN_VOL)
+
+def vanna_volga_derivatives(K, log_strikes, vols, log_forward, T):
+    # vanna_volga_vol and its first two strike derivatives over array K.
+    # With y = vol - s2 the second-order smile solves dd*y^2 + 2*s2*y - g = 0,
+    # so y', y'' follow by implicit differentiation in x = ln K (stable at dd = 0).
+    K = np.asarray(K, dtype=float)
+    x = np.log(K)
+    x1, x2, x3 = log_strikes
+    s1, s2, s3 = vols
+    first_order, dd, disc, limit = _vanna_volga_terms(x, log_strikes, vols, log_forward, T)
+    
+    # x-derivatives of the Lagrange weights (second derivatives are constants)
+    a1, a2, a3 = (x2 - x1) * (x3 - x1), (x2 - x1) * (x3 - x2), (x3 - x1) * (x3 - x2)
+    w1_x, w2_x, w3_x = (2.0 * x - x2 - x3) / a1, (x1 + x3 - 2.0 * x) / a2, (2.0 * x - x1 - x2) / a3
+    w1_xx, w2_xx, w3_xx = 2.0 / a1, -2.0 / a2, 2.0 / a3
+    f_x = w1_x * s1 + w2_x * s2 + w3_x * s3
+    f_xx = w1_xx * s1 + w2_xx * s2 + w3_xx * s3
+    
+    sq = s2 * math.sqrt(T)
+    def d1d2(xk):
+        d_1 = (log_forward - xk + 0.5 * sq**2) / sq
+        return d_1 * (d_1 - sq)
+    c1, c3 = d1d2(x1) * (s1 - s2)**2, d1d2(x3) * (s3 - s2)**2
+    g_x = 2.0 * s2 * f_x + w1_x * c1 + w3_x * c3
+    g_xx = 2.0 * s2 * f_xx + w1_xx * c1 + w3_xx * c3
+    d_1 = (log_forward - x + 0.5 * sq**2) / sq
+    dd_x = -(2.0 * d_1 - sq) / sq
+    dd_xx = 2.0 / sq**2
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.where(np.abs(dd) < 1e-12, limit - s2, (np.sqrt(disc) - s2) / dd)
+        denom = 2.0 * (dd * y + s2)
+        y_x = (g_x - dd_x * y**2) / denom
+        y_xx = (g_xx - dd_xx * y**2 - 4.0 * dd_x * y * y_x - 2.0 * dd * y_x**2) / denom
+    
+    second = disc >= 0
+    vol = np.where(second, s2 + y, first_order)
+    vol_x = np.where(second, y_x, f_x)
+    vol_xx = np.where(second, y_xx, f_xx)
+    # Floored wings are flat
+    floored = vol < VV_MIN_VOL
+    vol = np.maximum(vol, VV_MIN_VOL)
+    vol_x = np.where(floored, 0.0, vol_x)
+    vol_xx = np.where(floored, 0.0, vol_xx)
+    # Back from log strike to strike
+    return vol, vol_x / K, (vol_xx - vol_x) / K**2
+
+SMILE_MODELS = ('spline', 'vanna_volga')
+
 class VolatilitySurface:
-    def __init__(self, atm_vol, rr_25, st_25, rr_10, st_10):
+    # model='spline': natural cubic spline through all five knots, flat outside them.
+    # model='vanna_volga': closed-form Vanna-Volga through 25d put / ATM / 25d call,
+    # no spline object and no clamping in the wings. The 10d quotes still set
+    # the reported knots but do not enter the Vanna-Volga smile.
+    # State built by _solve_knots / _fit_smile, besides _knots
+    _FITTED = ('strikes', 'vols', 'k_atm', 'spline', '_segments', '_log_forward', '_T',
+               '_vv_log_strikes', '_vv_vols')
+    
+    def __init__(self, atm_vol, rr_25, st_25, rr_10, st_10, model='spline'):
+        # Bumped on every (re)build so downstream caches can tell the smile moved
+        self.version = 0
+        self.reset(atm_vol, rr_25, st_25, rr_10, st_10, model)
+        
+    def reset(self, atm_vol, rr_25, st_25, rr_10, st_10, model='spline'):
+        # New quotes in place, construct_smile must follow (version keeps counting)
+        if model not in SMILE_MODELS:
+            raise ValueError(f"Unknown smile model: {model}")
         # Market quotes
         self.sigma_atm = atm_vol
         self.rr_25 = rr_25
         self.st_25 = st_25
         self.rr_10 = rr_10
         self.st_10 = st_10
+        self.model = model
         
-    def construct_smile(self, pricer: VanillaFxOptionPricer):
-        # Derived vols
+    def assign(self, other):
+        # Become a copy of another constructed smile without re-solving or refitting,
+        # e.g. as the starting point for update_quotes bumps. The fitted objects are
+        # shared, which is safe because rebuilds replace rather than modify them.
+        self.reset(other.sigma_atm, other.rr_25, other.st_25, other.rr_10, other.st_10, other.model)
+        if not hasattr(self, '_knots'):
+            self._knots = {}
+        self._knots.clear()
+        self._knots.update(other._knots)
+        for attr in self._FITTED:
+            if hasattr(other, attr):
+                setattr(self, attr, getattr(other, attr))
+        self.version += 1
+        
+    def _knot_vol(self, key):
         # RR = Vol(25d Call) - Vol(25d Put)
         # ST = 0.5 * (Vol(25d Call) + Vol(25d Put)) - Vol(ATM)
         # -> Vol(25d Call) = ATM + ST + 0.5*RR
         # -> Vol(25d Put) = ATM + ST - 0.5*RR
+        for name, delta, option_type, rr_attr, st_attr, rr_sign in SMILE_KNOTS:
+            if name == key:
+                if rr_attr is None:
+                    return self.sigma_atm
+                return self.sigma_atm + getattr(self, st_attr) + rr_sign * getattr(self, rr_attr)
+        raise KeyError(key)
         
-        vol_25_call = self.sigma_atm + self.st_25 + 0.5 * self.rr_25
-        vol_25_put = self.sigma_atm + self.st_25 - 0.5 * self.rr_25
-        
-        vol_10_call = self.sigma_atm + self.st_10 + 0.5 * self.rr_10
-        vol_10_put = self.sigma_atm + self.st_10 - 0.5 * self.rr_10
-        
+    def _solve_knots(self, pricer, keys):
         # Determine strikes for these points
-        # Use initial guess of sigma_atm for strike determination? Or use the specific vol?
         # Convention: Use the vol OF that point to determine the strike.
+        # ATM is approximated as Delta Neutral (50d call strike at the ATM vol).
+        for name, delta, option_type, rr_attr, st_attr, rr_sign in SMILE_KNOTS:
+            if name in keys:
+                vol = self._knot_vol(name)
+                self._knots[name] = (pricer.get_delta_strike(delta, vol, option_type), vol)
+        # Vanna-Volga needs the market the knots were solved in
+        self._log_forward = float(np.log(pricer.calculate_forward()))
+        self._T = float(pricer.T)
+                
+    def _fit_smile(self, coeffs=None):
+        # Sort just in case (Put strikes < Call strikes usually)
+        points = sorted(self._knots.values())
+        self.strikes = [p[0] for p in points]
+        self.vols = [p[1] for p in points]
+        self.k_atm = self._knots['atm'][0]  # Store for reporting
         
-        k_atm = pricer.get_delta_strike(0.50, self.sigma_atm, 'call') # Approximate ATM Delta Neutral
-        # Technically ATM definition varies (ATMF, ATMS, Delta Neutral). Let's stick to Delta Neutral approx.
+        if self.model == 'vanna_volga':
+            pillars = [self._knots[name] for name in ('25p', 'atm', '25c')]
+            self._vv_log_strikes = tuple(float(np.log(k)) for k, v in pillars)
+            self._vv_vols = tuple(float(v) for k, v in pillars)
+            self.spline = None
+        else:
+            if coeffs is None:
+                coeffs = natural_spline_coefficients(self.strikes, self.vols)
+            self.spline = PPoly.construct_fast(coeffs, np.asarray(self.strikes, dtype=float))
+            # Per-segment (c0, c1, c2, c3) as floats for the scalar get_vol path
+            self._segments = np.asarray(coeffs, dtype=float).T.tolist()
+        self.version += 1
         
-        k_25_c = pricer.get_delta_strike(0.25, vol_25_call, 'call')
-        k_25_p = pricer.get_delta_strike(0.25, vol_25_put, 'put')
+    @classmethod
+    def from_knots(cls, atm_vol, rr_25, st_25, rr_10, st_10, knot_strikes, knot_vols, coeffs=None):
+        # Rebuild an already constructed spline smile without re-solving any strikes.
+        # knot_strikes / knot_vols are in SMILE_KNOTS order (see knot_arrays),
+        # coeffs optionally carries the fitted spline (PPoly layout, sorted knots).
+        surface = cls(atm_vol, rr_25, st_25, rr_10, st_10)
+        surface._knots = {
+            knot[0]: (float(k), float(v)) for knot, k, v in zip(SMILE_KNOTS, knot_strikes, knot_vols)
+        }
+        surface._fit_smile(coeffs)
+        return surface
         
-        k_10_c = pricer.get_delta_strike(0.10, vol_10_call, 'call')
-        k_10_p = pricer.get_delta_strike(0.10, vol_10_put, 'put')
+    def knot_arrays(self):
+        # (strikes, vols) of the solved knots in SMILE_KNOTS order
+        strikes = [self._knots[knot[0]][0] for knot in SMILE_KNOTS]
+        vols = [self._knots[knot[0]][1] for knot in SMILE_KNOTS]
+        return strikes, vols
         
-        self.k_atm = k_atm  # Store for reporting
+    def construct_smile(self, pricer: VanillaFxOptionPricer):
+        self._knots = {}
+        self._solve_knots(pricer, QUOTE_KNOTS['atm_vol'])
+        self._fit_smile()
         
-        strikes = [k_10_p, k_25_p, k_atm, k_25_c, k_10_c]
-        vols = [vol_10_put, vol_25_put, self.sigma_atm, vol_25_call, vol_10_call]
+    def update_quotes(self, pricer: VanillaFxOptionPricer, **quotes):
+        # In-place update for a subset of quotes, e.g. update_quotes(pricer, rr_25=0.012).
+        # Only the knots fed by the changed quotes are re-solved; the rest are reused.
+        # pricer must describe the same market the smile was constructed against.
+        if not hasattr(self, '_knots'):
+            raise ValueError("construct_smile must be called before update_quotes")
         
-        # Sort just in case (Put strikes < Call strikes usually)
-        points = sorted(zip(strikes, vols))
-        self.strikes = [p[0] for p in points]
-        self.vols = [p[1] for p in points]
+        unknown = [name for name in quotes if name not in QUOTE_KNOTS]
+        if unknown:
+            raise ValueError(f"Unknown quote: {unknown[0]}")
+        changed, dirty = {}, set()
+        for name, value in quotes.items():
+            attr = 'sigma_atm' if name == 'atm_vol' else name
+            if getattr(self, attr) != value:
+                changed[attr] = value
+                dirty.update(QUOTE_KNOTS[name])
+        if not dirty:
+            return dirty
         
-        self.spline = CubicSpline(self.strikes, self.vols, bc_type='natural')
+        # A failed rebuild leaves the smile exactly as it was, quotes included
+        saved = {attr: getattr(self, attr) for attr in changed}
+        saved.update((attr, getattr(self, attr)) for attr in self._FITTED if hasattr(self, attr))
+        saved['_knots'] = dict(self._knots)
+        try:
+            for attr, value in changed.items():
+                setattr(self, attr, value)
+            self._solve_knots(pricer, dirty)
+            self._fit_smile()
+        except Exception:
+            for attr, value in saved.items():
+                setattr(self, attr, value)
+            raise
+        return dirty
+        
+    def get_vol_derivatives(self, K):
+        # (vol, dvol/dK, d2vol/dK2) over array K, analytic for both smile models.
+        # The spline is flat outside its knots, so both derivatives are 0 there.
+        if self.model == 'vanna_volga':
+            return vanna_volga_derivatives(K, self._vv_log_strikes, self._vv_vols, self._log_forward, self._T)
+        
+        K = np.asarray(K, dtype=float)
+        x, c = self.spline.x, self.spline.c
+        inside = (K >= x[0]) & (K <= x[-1])
+        k = np.clip(K, x[0], x[-1])
+        i = np.clip(np.searchsorted(x, k, side='right') - 1, 0, len(x) - 2)
+        dx = k - x[i]
+        c0, c1, c2, c3 = c[:, i]  # one gather for all four coefficients
+        vol = ((c0 * dx + c1) * dx + c2) * dx + c3
+        dvol = np.where(inside, (3.0 * c0 * dx + 2.0 * c1) * dx + c2, 0.0)
+        d2vol = np.where(inside, 6.0 * c0 * dx + 2.0 * c1, 0.0)
+        return vol, dvol, d2vol
         
     def get_vol(self, K):
+        # Scalar K returns a float, array K an array of the same shape
+        if self.model == 'vanna_volga':
+            return vanna_volga_vol(K, self._vv_log_strikes, self._vv_vols, self._log_forward, self._T)
+        
+        if np.ndim(K) > 0:
+            # Flat extrapolation, evaluated by the active compute backend
+            return get_backend().spline_vol(K, self.spline.x, self.spline.c)
+        
         # Extrapolation could be dangerous with spline, but for this demo let's allow it or clamp
         if K < self.strikes[0]:
             return self.vols[0] # Flat extrap
         if K > self.strikes[-1]:
             return self.vols[-1]
-        return float(self.spline(K))
+        # Horner on the segment's floats: same polynomial as self.spline(K), no arrays
+        i = min(bisect_right(self.strikes, K), len(self.strikes) - 1) - 1
+        dx = K - self.strikes[i]
+        c0, c1, c2, c3 = self._segments[i]
+        return float(((c0 * dx + c1) * dx + c2) * dx + c3)
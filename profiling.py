@@ -0,0 +1,274 @@
+import cProfile
+import functools
+import hmac
+import itertools
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, g, jsonify, request
+
+# Opt-in request profiling.
+#
+# Admin mode: a request carrying X-Admin-Token (matching PROFILE_ADMIN_TOKEN)
+# and X-Profile: 1 runs under cProfile + tracemalloc; the report is stored and
+# its id returned in the X-Profile-Id response header.
+#
+# Auto capture: with PROFILE_SLOW_MS set, a request slower than the threshold
+# is replayed once under the profiler and the report stored. The replay is
+# registered with response.call_on_close, so it runs after the response has
+# been sent and the client never waits for it. The profile is therefore of a
+# warm second run (caches, imports and JIT already paid for by the first).
+#
+# Allocation figures (peak_alloc_kb, top_retained_allocations) come from
+# tracemalloc, which traces the whole process: with the threaded server they
+# include whatever other requests allocated meanwhile. Each report says so
+# (allocation_scope) and counts the requests that overlapped the capture
+# (concurrent_requests); only reports with 0 there are attributable to the
+# profiled request alone. The cProfile figures are per thread and unaffected.
+#
+# Reports are kept in a bounded in-memory ring (PROFILE_MAX_STORED) and served
+# from /admin/profiles. With no admin token configured everything is disabled.
+
+DEFAULTS = {
+    'PROFILE_ADMIN_TOKEN': os.environ.get('PRICER_ADMIN_TOKEN'),
+    'PROFILE_SLOW_MS': float(os.environ['PRICER_PROFILE_SLOW_MS']) if os.environ.get('PRICER_PROFILE_SLOW_MS') else None,
+    'PROFILE_MAX_STORED': 50,
+    'PROFILE_TOP_N': 25,
+}
+
+# tracemalloc is process wide, so only one capture runs at a time
+_capture_lock = threading.Lock()
+
+
+class RequestActivity:
+    # Requests in flight and started so far, to tell how many overlapped a capture
+    def __init__(self):
+        self.in_flight = 0
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.started += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def mark(self):
+        with self._lock:
+            return self.in_flight, self.started
+
+
+_activity = RequestActivity()
+
+
+class ProfileStore:
+    def __init__(self, maxlen=50):
+        self._reports = deque(maxlen=maxlen)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def add(self, report):
+        with self._lock:
+            report['id'] = next(self._ids)
+            self._reports.append(report)
+        return report['id']
+
+    def get(self, report_id):
+        with self._lock:
+            for report in self._reports:
+                if report['id'] == report_id:
+                    return report
+        return None
+
+    def summaries(self):
+        with self._lock:
+            return [
+                {k: r[k] for k in ('id', 'path', 'trigger', 'captured_at', 'elapsed_ms')}
+                for r in self._reports
+            ]
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+
+
+def _top_functions(profiler, n):
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:n]
+    return [
+        {'function': func, 'file': filename, 'line': line,
+         'ncalls': nc, 'tottime_ms': tt * 1000.0, 'cumtime_ms': ct * 1000.0}
+        for (filename, line, func), (cc, nc, tt, ct, callers) in rows
+    ]
+
+
+# The profiler's own bookkeeping is not part of the request
+_ALLOCATION_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, cProfile.__file__),
+    tracemalloc.Filter(False, pstats.__file__),
+)
+
+
+def _top_allocations(before, after, n):
+    # Growth between the snapshots around the call, i.e. memory the request
+    # allocated and still held when it returned (temporaries freed inside the
+    # call only show up in peak_alloc_kb)
+    diffs = after.filter_traces(_ALLOCATION_FILTERS).compare_to(before.filter_traces(_ALLOCATION_FILTERS), 'lineno')
+    return [
+        {'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         'size_kb': stat.size_diff / 1024.0, 'count': stat.count_diff}
+        for stat in diffs[:n] if stat.size_diff > 0
+    ]
+
+
+def profile_call(fn, *args, top_n=25, **kwargs):
+    # Run fn under cProfile and tracemalloc, returns (result, report).
+    # Callers must hold _capture_lock.
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        result = profiler.runcall(fn, *args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+
+    report = {
+        'elapsed_ms': elapsed * 1000.0,
+        # tracemalloc sees every thread's allocations, not just fn's
+        'allocation_scope': 'process',
+        'peak_alloc_kb': peak / 1024.0,
+        'top_cumulative': _top_functions(profiler, top_n),
+        'top_retained_allocations': _top_allocations(before, after, top_n),
+    }
+    return result, report
+
+
+def _store():
+    return current_app.extensions['profile_store']
+
+
+def _is_admin():
+    token = current_app.config.get('PROFILE_ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def _capture(view, args, kwargs, trigger, blocking):
+    if not _capture_lock.acquire(blocking=blocking):
+        return None, None
+    try:
+        # Requests in flight now (minus this one, if it is still being served) or started before the end
+        in_flight, started = _activity.mark()
+        own = 1 if g.get('_profiling_counted') else 0
+        result, report = profile_call(view, *args, top_n=current_app.config['PROFILE_TOP_N'], **kwargs)
+        report['concurrent_requests'] = in_flight - own + _activity.mark()[1] - started
+    finally:
+        _capture_lock.release()
+    report.update(
+        path=request.path,
+        trigger=trigger,
+        captured_at=datetime.now(timezone.utc).isoformat(),
+        payload=request.get_json(silent=True),
+    )
+    return result, _store().add(report)
+
+
+def profiled(view):
+    # Decorator for views that should support on-demand and slow-request profiling
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.headers.get('X-Profile') == '1' and _is_admin():
+            result, report_id = _capture(view, args, kwargs, 'admin', blocking=True)
+            response = current_app.make_response(result)
+            response.headers['X-Profile-Id'] = str(report_id)
+            return response
+
+        threshold = current_app.config.get('PROFILE_SLOW_MS')
+        if threshold is None or not current_app.config.get('PROFILE_ADMIN_TOKEN'):
+            return view(*args, **kwargs)
+
+        start = time.perf_counter()
+        response = current_app.make_response(view(*args, **kwargs))
+        if (time.perf_counter() - start) * 1000.0 > threshold:
+            # Replay once the response is out, in a copy of this request's context;
+            # skipped if another capture is already running
+            app = current_app._get_current_object()
+            replay = {
+                'path': request.path, 'method': request.method, 'query_string': request.query_string,
+                'headers': list(request.headers.items()), 'data': request.get_data(),
+            }
+
+            @response.call_on_close
+            def _replay():
+                with app.test_request_context(**replay):
+                    try:
+                        _capture(view, args, kwargs, 'slow', blocking=False)
+                    except Exception:
+                        app.logger.exception("Slow-request profile capture failed")
+        return response
+    return wrapper
+
+
+admin = Blueprint('profiling', __name__, url_prefix='/admin/profiles')
+
+
+@admin.before_request
+def _require_admin():
+    if not _is_admin():
+        return jsonify({'success': False, 'message': 'Forbidden'}), 403
+
+
+@admin.route('', methods=['GET'])
+def list_profiles():
+    return jsonify({'success': True, 'profiles': _store().summaries()})
+
+
+@admin.route('/<int:report_id>', methods=['GET'])
+def get_profile(report_id):
+    report = _store().get(report_id)
+    if report is None:
+        return jsonify({'success': False, 'message': 'Unknown profile'}), 404
+    return jsonify({'success': True, 'profile': report})
+
+
+@admin.route('', methods=['DELETE'])
+def clear_profiles():
+    _store().clear()
+    return jsonify({'success': True})
+
+
+def _request_started():
+    _activity.enter()
+    g._profiling_counted = True
+
+
+def _request_finished(exc):
+    # Replays run in a bare request context that never went through _request_started
+    if g.pop('_profiling_counted', False):
+        _activity.leave()
+
+
+def init_app(app):
+    for key, value in DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.extensions['profile_store'] = ProfileStore(app.config['PROFILE_MAX_STORED'])
+    app.before_request(_request_started)
+    app.teardown_request(_request_finished)
+    app.register_blueprint(admin)
@@ -0,0 +1,93 @@
+import numpy as np
+from pricing import VanillaFxOptionPricer, structure_legs
+
+# Roll-down of a structure's value and Greeks to expiry.
+#
+# All horizons are evaluated in one broadcasted pass: the pricer is rebuilt
+# once with array-valued time to expiry / forward (see VanillaFxOptionPricer)
+# instead of once per date. Spot and the flat rd / rf of the base pricer are
+# held fixed, so the forward at horizon t is S * exp((rd - rf) * (T - t)).
+# Values are as seen at each horizon (not discounted back to today).
+#
+# Smile dynamics:
+#   sticky_strike  each strike keeps today's smile vol.
+#   sticky_delta   the smile moves with the forward and its moneyness axis
+#                  scales with sqrt(time), so an option keeps the vol of the
+#                  point with the same ln(K/F)/sqrt(tau) on today's smile,
+#                  i.e. roughly the same delta. Close to expiry that point
+#                  runs off into the far wings, so it is held within
+#                  +/- MONEYNESS_STD ATM standard deviations of today's
+#                  forward (the span of density.strike_grid).
+
+DYNAMICS = ('sticky_strike', 'sticky_delta')
+MONEYNESS_STD = 5.0
+
+
+def _equivalent_strike(K, forward_now, forward_t, T, tau, width):
+    # Strike on today's smile with the same standardized moneyness ln(K/F)/sqrt(tau),
+    # log-moneyness clamped to +/- width
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        scale = np.sqrt(T / tau)
+        moneyness = np.log(K / forward_t) * np.where(tau > 0, scale, 1.0)
+    return forward_now * np.exp(np.clip(moneyness, -width, width))
+
+
+def project(pricer, surface, structure, strike, horizons, strike_2=None, dynamics='sticky_strike'):
+    # pricer / surface: today's market (constructed smile).
+    # structure: call, put, strangle or risk_reversal with price strikes.
+    # horizons: valuation times in years from today, 0 <= t <= T.
+    # Returns a dict of arrays over horizons: value, delta, vega, forward, leg_vols.
+    if dynamics not in DYNAMICS:
+        raise ValueError(f"Unknown smile dynamics: {dynamics}")
+    if np.ndim(pricer.T) != 0:
+        raise ValueError("project needs a single-expiry pricer")
+
+    horizons = np.asarray(horizons, dtype=float)
+    if np.any(horizons < 0) or np.any(horizons > pricer.T):
+        raise ValueError("Horizons must lie between today and expiry")
+
+    S = pricer.S
+    tau = pricer.T - horizons
+    forward_t = S * np.exp((pricer.rd - pricer.rf) * tau)
+    live = tau > 0
+
+    # One pricer for every horizon at once
+    rolled = VanillaFxOptionPricer(S, pricer.rd, forward_t, tau)
+
+    value = np.zeros(tau.shape)
+    delta = np.zeros(tau.shape)
+    vega = np.zeros(tau.shape)
+    leg_vols = []
+    for sign, option_type, K in structure_legs(structure, strike, strike_2):
+        if dynamics == 'sticky_strike':
+            vol = np.broadcast_to(np.asarray(surface.get_vol(K), dtype=float), tau.shape)
+        else:
+            vol = np.asarray(surface.get_vol(
+                _equivalent_strike(K, pricer.calculate_forward(), forward_t, pricer.T, tau,
+                                   MONEYNESS_STD * surface.sigma_atm * np.sqrt(pricer.T))
+            ), dtype=float)
+        leg_vols.append(vol)
+
+        leg_value = rolled.price(vol, K, option_type)
+        leg_delta = rolled.calculate_delta(K, vol, option_type)
+        leg_vega = rolled.calculate_vega(K, vol)
+
+        # At expiry: intrinsic value, digital delta, no vega
+        is_call = option_type.lower() == 'call'
+        intrinsic = max(S - K, 0.0) if is_call else max(K - S, 0.0)
+        itm = (S > K) if is_call else (S < K)
+        expiry_delta = (1.0 if is_call else -1.0) if itm else 0.0
+
+        value += sign * np.where(live, leg_value, intrinsic)
+        delta += sign * np.where(live, leg_delta, expiry_delta)
+        vega += sign * np.where(live, leg_vega, 0.0)
+
+    return {
+        'horizon': horizons,
+        'time_to_expiry': tau,
+        'forward': forward_t,
+        'value': value,
+        'delta': delta,
+        'vega': vega,
+        'leg_vols': np.array(leg_vols),
+    }
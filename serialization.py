@@ -0,0 +1,138 @@
+import json
+import struct
+import numpy as np
+from flask import Response
+
+# Optional fast encoders. Both are used when installed, otherwise we fall back
+# to the standard library (JSON) or refuse the content type (MessagePack).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+BINARY_MIMETYPE = 'application/x-fxpricer-f64'
+
+# Raw binary layout (all little-endian):
+#   4 bytes   magic b'FXP2'
+#   uint32    length of the JSON metadata block
+#   ...       JSON metadata: {'fields': <non-array values>, 'arrays': [[name, shape], ...]}
+#   ...       zero padding up to the next 8-byte boundary
+#   ...       float64 arrays back to back (C order), in the order listed in 'arrays'
+# Array names are dotted paths into the payload, e.g. 'plot_data.curve_x'.
+# FXP1 recorded only lengths, so arrays of more than one dimension came back flat.
+BINARY_MAGIC = b'FXP2'
+_HEADER = struct.Struct('<4sI')
+
+
+def available_mimetypes():
+    # JSON first so browsers sending */* keep getting what the UI expects
+    mimetypes = [JSON_MIMETYPE, BINARY_MIMETYPE]
+    if msgpack is not None:
+        mimetypes.append(MSGPACK_MIMETYPE)
+    return mimetypes
+
+
+def _json_default(obj):
+    # Only reached on the stdlib fallback path
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == 'f' and not np.all(np.isfinite(obj)):
+            # NaN/inf -> null, same as orjson
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def encode_json(payload):
+    if orjson is not None:
+        # orjson writes ndarrays and numpy scalars natively, no list round trip
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        arr = np.ascontiguousarray(obj, dtype='<f8')
+        return {'dtype': '<f8', 'shape': list(arr.shape), 'data': arr.tobytes()}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def encode_msgpack(payload):
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def _split_arrays(payload, prefix, fields, arrays):
+    # Pull every numeric ndarray out of the (nested) payload, leaving the rest as JSON
+    for key, value in payload.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            fields[key] = {}
+            _split_arrays(value, name + '.', fields[key], arrays)
+        elif isinstance(value, np.ndarray) and value.dtype.kind in 'fiu':
+            arrays.append((name, np.asarray(value, dtype='<f8', order='C')))
+        elif isinstance(value, np.generic):
+            fields[key] = value.item()
+        else:
+            fields[key] = value
+
+
+def encode_binary(payload):
+    fields, arrays = {}, []
+    _split_arrays(payload, '', fields, arrays)
+    meta = json.dumps(
+        {'fields': fields, 'arrays': [[name, list(arr.shape)] for name, arr in arrays]},
+        default=_json_default, separators=(',', ':')
+    ).encode()
+
+    head = _HEADER.pack(BINARY_MAGIC, len(meta)) + meta
+    head += b'\0' * (-len(head) % 8)
+    return b''.join([head] + [arr.tobytes() for _, arr in arrays])
+
+
+def decode_binary(buf):
+    # Inverse of encode_binary, arrays come back as float64 views over buf
+    magic, meta_len = _HEADER.unpack_from(buf, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError("Not an FXP2 payload")
+    offset = _HEADER.size
+    meta = json.loads(bytes(buf[offset:offset + meta_len]))
+    offset += meta_len
+    offset += -offset % 8
+
+    payload = meta['fields']
+    for name, shape in meta['arrays']:
+        length = int(np.prod(shape))
+        arr = np.frombuffer(buf, dtype='<f8', count=length, offset=offset).reshape(shape)
+        offset += 8 * length
+
+        target = payload
+        *parents, leaf = name.split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = arr
+    return payload
+
+
+def encode_response(payload, accept_mimetypes, status=200):
+    # Content negotiation on the request's Accept header
+    mimetype = accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIMETYPE)
+
+    if mimetype == BINARY_MIMETYPE:
+        body = encode_binary(payload)
+    elif mimetype == MSGPACK_MIMETYPE:
+        body = encode_msgpack(payload)
+    else:
+        body = encode_json(payload)
+    return Response(body, status=status, mimetype=mimetype)
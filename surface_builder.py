@@ -0,0 +1,188 @@
+import os
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from pricing import VanillaFxOptionPricer, VolatilitySurface, MARKET_FIELDS, SMILE_KNOTS
+
+# Bulk smile construction for many pairs/tenors at once.
+# Quotes go into one shared-memory block, workers solve ranges of rows and write
+# their knots and spline coefficients straight into a second shared block, so
+# nothing but (start, stop) ranges is ever pickled. Each row is a pure function
+# of its quotes, so the result is bitwise identical for any worker count.
+#
+# Blocks belong to the process that built them. Readers elsewhere attach by name;
+# a reader with its own resource tracker (any process not started through
+# multiprocessing) unregisters the block, otherwise its tracker would unlink
+# the owner's block when the reader exits.
+
+N_KNOTS = len(SMILE_KNOTS)
+# Output row layout: knot strikes (SMILE_KNOTS order), knot vols, spline coefficients (4 x 4)
+STRIKES = slice(0, N_KNOTS)
+VOLS = slice(N_KNOTS, 2 * N_KNOTS)
+COEFFS = slice(2 * N_KNOTS, 2 * N_KNOTS + 4 * (N_KNOTS - 1))
+ROW_WIDTH = COEFFS.stop
+
+# Set per worker process by _init_worker
+_quotes = None
+_out = None
+_handles = None
+
+# Names of the blocks created (and so owned) by this process
+_created = set()
+
+
+def _open_block(name):
+    # Existing block by name. multiprocessing children share their parent's
+    # resource tracker and keep the registration, which the owner's unlink removes.
+    shm = shared_memory.SharedMemory(name=name)
+    if multiprocessing.parent_process() is None and shm.name not in _created:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def _attach(name, shape):
+    shm = _open_block(name)
+    return shm, np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+
+
+def _init_worker(quotes_name, out_name, n_rows):
+    global _quotes, _out, _handles
+    quotes_shm, _quotes = _attach(quotes_name, (n_rows, len(MARKET_FIELDS)))
+    out_shm, _out = _attach(out_name, (n_rows, ROW_WIDTH))
+    _handles = (quotes_shm, out_shm)  # keep the mappings alive for the worker's lifetime
+
+
+def _build_rows(quotes, out, start, stop):
+    for i in range(start, stop):
+        spot, rd, forward, T, atm, rr25, st25, rr10, st10 = quotes[i]
+        try:
+            pricer = VanillaFxOptionPricer(spot, rd, forward, T)
+            surface = VolatilitySurface(atm, rr25, st25, rr10, st10)
+            surface.construct_smile(pricer)
+            strikes, vols = surface.knot_arrays()
+            out[i, STRIKES] = strikes
+            out[i, VOLS] = vols
+            out[i, COEFFS] = surface.spline.c.ravel()
+        except Exception:
+            # Unsolvable quote sets are left as NaN rows, see BulkSurfaces.failed
+            out[i] = np.nan
+    return stop - start
+
+
+def _build_range(start, stop):
+    return _build_rows(_quotes, _out, start, stop)
+
+
+class BulkSurfaces:
+    # Smiles for many (pair, tenor) keys backed by one shared-memory block.
+    # strikes / vols / coeffs are zero-copy views; close() releases the block.
+    def __init__(self, keys, quotes, shm, owner=True):
+        self.keys = list(keys)
+        self.index = {key: i for i, key in enumerate(self.keys)}
+        self.quotes = quotes
+        self.shm = shm
+        self.owner = owner
+        self.data = np.ndarray((len(self.keys), ROW_WIDTH), dtype=np.float64, buffer=shm.buf)
+
+    @classmethod
+    def attach(cls, shm_name, keys, quotes=None):
+        # Map an existing result from another process by name (read-only use)
+        return cls(keys, quotes, _open_block(shm_name), owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def strikes(self):
+        return self.data[:, STRIKES]
+
+    @property
+    def vols(self):
+        return self.data[:, VOLS]
+
+    @property
+    def coeffs(self):
+        return self.data[:, COEFFS].reshape(len(self.keys), 4, N_KNOTS - 1)
+
+    @property
+    def failed(self):
+        return [key for key, row in zip(self.keys, self.data) if np.isnan(row[0])]
+
+    def surface(self, key):
+        # VolatilitySurface for one key, rebuilt from the shared knots without re-solving
+        i = self.index[key]
+        if np.isnan(self.data[i, 0]):
+            raise ValueError(f"Smile for {key} could not be built")
+        if self.quotes is None:
+            raise ValueError("Quotes are needed to rebuild a VolatilitySurface")
+        atm, rr25, st25, rr10, st10 = self.quotes[i, 4:]
+        return VolatilitySurface.from_knots(
+            atm, rr25, st25, rr10, st10, self.strikes[i], self.vols[i], self.coeffs[i].copy()
+        )
+
+    def close(self):
+        # Views into the block must not be used after this
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            _created.discard(self.shm.name)
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                # Already removed by someone else, only our tracker entry is left
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_surfaces(quotes, workers=None, chunk_size=64):
+    # quotes: iterable of dicts with 'pair', 'tenor' and pricing.MARKET_FIELDS.
+    # workers=None uses every core, workers=1 builds in-process.
+    quotes = list(quotes)
+    keys = [(q['pair'], q['tenor']) for q in quotes]
+    if len(set(keys)) != len(keys):
+        raise ValueError("Duplicate (pair, tenor) in quotes")
+    n = len(quotes)
+    workers = workers or os.cpu_count() or 1
+
+    values = np.array([[float(q[f]) for f in MARKET_FIELDS] for q in quotes], dtype=np.float64)
+    values = values.reshape(n, len(MARKET_FIELDS))
+
+    # SharedMemory refuses zero-sized blocks
+    out_shm = shared_memory.SharedMemory(create=True, size=max(n * ROW_WIDTH * 8, 8))
+    _created.add(out_shm.name)
+    try:
+        out = np.ndarray((n, ROW_WIDTH), dtype=np.float64, buffer=out_shm.buf)
+        ranges = [(s, min(s + chunk_size, n)) for s in range(0, n, chunk_size)]
+
+        if workers == 1 or len(ranges) <= 1:
+            for start, stop in ranges:
+                _build_rows(values, out, start, stop)
+        else:
+            quotes_shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+            try:
+                np.ndarray(values.shape, dtype=np.float64, buffer=quotes_shm.buf)[:] = values
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(ranges)),
+                    initializer=_init_worker,
+                    initargs=(quotes_shm.name, out_shm.name, n),
+                ) as pool:
+                    # Consume results so worker exceptions surface here
+                    list(pool.map(_build_range, *zip(*ranges)))
+            finally:
+                quotes_shm.close()
+                quotes_shm.unlink()
+        del out
+    except BaseException:
+        _created.discard(out_shm.name)
+        out_shm.close()
+        out_shm.unlink()
+        raise
+
+    return BulkSurfaces(keys, values, out_shm)
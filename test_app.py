@@ -3,6 +3,8 @@ import unittest
 import json
 from app import app
 from pricing import VanillaFxOptionPricer, VolatilitySurface
+import numpy as np
+import serialization
 
 class TestApp(unittest.TestCase):
     def setUp(self):
@@ -53,5 +55,120 @@ class TestApp(unittest.TestCase):
         # 25 Delta Call/Put means rough strikes.
         # This is more about checking that the app logic averages them correctly.
 
+    def _post(self, payload, accept=None):
+        headers = {'Accept': accept} if accept else {}
+        return self.app.post('/calculate',
+                             data=json.dumps(payload),
+                             content_type='application/json',
+                             headers=headers)
+
+    def test_binary_response_matches_json(self):
+        payload = {
+            'spot_ref': 1.0, 'rd': 0.01, 'forward': 1.01, 'T': 0.5,
+            'atm': 0.10, 'rr25': 0.01, 'st25': 0.003, 'rr10': 0.02, 'st10': 0.01,
+            'type': 'strangle', 'strike_type': 'delta', 'strike': 0.25
+        }
+        
+        as_json = json.loads(self._post(payload).data)
+        response = self._post(payload, accept=serialization.BINARY_MIMETYPE)
+        
+        self.assertEqual(response.mimetype, serialization.BINARY_MIMETYPE)
+        as_binary = serialization.decode_binary(response.data)
+        
+        self.assertTrue(as_binary['success'])
+        self.assertAlmostEqual(as_binary['price'], as_json['price'])
+        for key in ('curve_x', 'curve_y', 'payoff_y', 'points_x'):
+            self.assertIsInstance(as_binary['plot_data'][key], np.ndarray)
+            np.testing.assert_allclose(as_binary['plot_data'][key], as_json['plot_data'][key])
+        self.assertEqual(as_binary['plot_data']['point_labels'], as_json['plot_data']['point_labels'])
+
+    def test_binary_round_trip_keeps_shapes(self):
+        payload = {'grid': np.arange(12.0).reshape(3, 4), 'nested': {'scalar': np.array(2.5), 'empty': np.zeros((0, 3))},
+                   'ints': np.arange(3), 'label': 'x'}
+        decoded = serialization.decode_binary(serialization.encode_binary(payload))
+        
+        np.testing.assert_array_equal(decoded['grid'], payload['grid'])
+        self.assertEqual(decoded['nested']['scalar'].shape, ())
+        self.assertEqual(decoded['nested']['empty'].shape, (0, 3))
+        np.testing.assert_array_equal(decoded['ints'], [0.0, 1.0, 2.0])
+        self.assertEqual(decoded['label'], 'x')
+
+    def test_default_and_wildcard_accept_return_json(self):
+        payload = {'type': 'call', 'strike': 1.0}
+        for accept in (None, '*/*'):
+            response = self._post(payload, accept=accept)
+            self.assertEqual(response.mimetype, serialization.JSON_MIMETYPE)
+            self.assertTrue(json.loads(response.data)['success'])
+
+    @unittest.skipIf(serialization.msgpack is None, "msgpack not installed")
+    def test_msgpack_response(self):
+        response = self._post({'type': 'put', 'strike': 0.95}, accept=serialization.MSGPACK_MIMETYPE)
+        self.assertEqual(response.mimetype, serialization.MSGPACK_MIMETYPE)
+        data = serialization.msgpack.unpackb(response.data)
+        curve = data['plot_data']['curve_x']
+        self.assertEqual(curve['dtype'], '<f8')
+        self.assertEqual(len(np.frombuffer(curve['data'], dtype='<f8')), curve['shape'][0])
+
+    def test_chain_endpoint(self):
+        payload = {
+            'spot_ref': 1.0, 'rd': 0.01, 'forward': 1.01, 'T': 0.5,
+            'atm': 0.10, 'rr25': 0.01, 'st25': 0.003, 'rr10': 0.02, 'st10': 0.01,
+            'type': 'call', 'delta_range': [0.05, 0.95, 200]
+        }
+        response = self.app.post('/chain', data=json.dumps(payload), content_type='application/json')
+        data = json.loads(response.data)
+        
+        self.assertTrue(data['success'], msg=data.get('message'))
+        chain = data['chain']
+        self.assertEqual(len(chain['strike']), 200)
+        np.testing.assert_allclose(chain['delta'], np.linspace(0.05, 0.95, 200), atol=1e-8)
+        # Higher call delta -> lower strike
+        self.assertTrue(np.all(np.diff(chain['strike']) < 0))
+        self.assertEqual(set(chain['model_vega']), {'atm', 'rr25', 'st25', 'rr10', 'st10'})
+        
+        # Strike ladder, and input validation
+        payload = dict(payload, strikes=[0.9, 1.0, 1.1], delta_range=None)
+        data = json.loads(self.app.post('/chain', data=json.dumps(payload), content_type='application/json').data)
+        self.assertEqual(len(data['chain']['price']), 3)
+        
+        # Oversized or nested ladders are refused before allocating, flags must be JSON booleans
+        for bad in ({'strikes': None, 'strike_range': [0.9, 1.1, 20000000]},
+                    {'strikes': [1.0] * 2001},
+                    {'strikes': [[1.0] * 5000]},
+                    {'strikes': [1.0, [1.1, 1.2]]},
+                    {'sensitivities': 'false'}):
+            response = self.app.post('/chain', data=json.dumps(dict(payload, **bad)), content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        data = json.loads(self.app.post('/chain', data=json.dumps(dict(payload, sensitivities=False)),
+                                        content_type='application/json').data)
+        self.assertTrue(data['success'], msg=data.get('message'))
+        
+        payload = dict(payload, type='strangle')
+        response = self.app.post('/chain', data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_price_against_published_market(self):
+        market = {
+            'spot_ref': 1.0, 'rd': 0.01, 'forward': 1.01, 'T': 0.5,
+            'atm': 0.10, 'rr25': 0.01, 'st25': 0.003, 'rr10': 0.02, 'st10': 0.01,
+        }
+        contract = {'type': 'call', 'strike_type': 'price', 'strike': 1.02}
+        response = self.app.post('/market/EUR/USD', data=json.dumps(market), content_type='application/json')
+        version = json.loads(response.data)['version']
+        self.app.post('/market/EUR/USD', data=json.dumps(dict(market, atm=0.12)), content_type='application/json')
+        
+        inline = json.loads(self._post(dict(market, **contract)).data)
+        pinned = json.loads(self._post(dict(contract, pair='EUR/USD', version=version)).data)
+        latest = json.loads(self._post(dict(contract, pair='EUR/USD')).data)
+        
+        self.assertEqual(pinned['market_version'], version)
+        self.assertEqual(latest['market_version'], version + 1)
+        self.assertAlmostEqual(pinned['price'], inline['price'], places=12)
+        self.assertGreater(latest['price'], pinned['price'])
+        
+        described = json.loads(self.app.get(f'/market/EUR/USD?version={version}').data)
+        self.assertEqual(described['market']['atm'], 0.10)
+        self.assertEqual(self._post(dict(contract, pair='GBP/USD')).status_code, 400)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+import warnings
+import numpy as np
+import pytest
+import backends
+from pricing import VanillaFxOptionPricer, VolatilitySurface
+
+BACKEND_NAMES = ['numpy', pytest.param('numba', marks=pytest.mark.skipif(
+    backends.numba is None, reason="numba not installed"))]
+
+@pytest.fixture(params=BACKEND_NAMES)
+def backend(request):
+    previous = backends.get_backend()
+    yield backends.set_backend(request.param)
+    backends._active = previous
+
+def random_book(n=500, seed=3):
+    rng = np.random.default_rng(seed)
+    T = rng.uniform(0.01, 3.0, n)
+    T[:5] = [0.0, -0.1, 1e-8, 0.5, 1.0]  # expired / degenerate entries
+    F = rng.uniform(0.8, 1.5, n)
+    K = F * rng.uniform(0.7, 1.3, n)
+    sigma = rng.uniform(0.02, 0.4, n)
+    sigma[3] = 0.0
+    rd = rng.uniform(-0.01, 0.06, n)
+    return T, F, K, sigma, rd
+
+def test_kernels_match_scalar_pricer(backend):
+    T, F, K, sigma, rd = random_book()
+    book = VanillaFxOptionPricer(1.1, rd, F, T)
+    
+    prices = {t: book.price(sigma, K, t) for t in ('call', 'put')}
+    deltas = {t: book.calculate_delta(K, sigma, t) for t in ('call', 'put')}
+    vegas = book.calculate_vega(K, sigma)
+    d1s = book.d1(K, sigma)
+    
+    # T = -0.1 has no meaningful price; everything else must match the scalar path
+    for i in range(len(T)):
+        if T[i] < 0:
+            continue
+        single = VanillaFxOptionPricer(1.1, rd[i], F[i], T[i])
+        assert np.isclose(d1s[i], single.d1(K[i], sigma[i]))
+        assert np.isclose(vegas[i], single.calculate_vega(K[i], sigma[i]), atol=1e-12)
+        for t in ('call', 'put'):
+            assert np.isclose(prices[t][i], single.price(sigma[i], K[i], t), atol=1e-12)
+            assert np.isclose(deltas[t][i], single.calculate_delta(K[i], sigma[i], t), atol=1e-12)
+
+def test_backends_agree_with_numpy(backend):
+    T, F, K, sigma, rd = random_book(seed=11)
+    ref = backends.NumpyBackend
+    ok = T >= 0
+    
+    assert np.allclose(backend.d1(F, K, sigma, T), ref.d1(F, K, sigma, T))
+    assert np.allclose(backend.d2(F, K, sigma, T)[ok], ref.d2(F, K, sigma, T)[ok])
+    for is_call in (True, False):
+        assert np.allclose(backend.price(F, K, sigma, T, rd, is_call)[ok], ref.price(F, K, sigma, T, rd, is_call)[ok])
+        assert np.allclose(backend.delta(F, K, sigma, T, rd, is_call), ref.delta(F, K, sigma, T, rd, is_call))
+    assert np.allclose(backend.vega(1.1, F, K, sigma, T, rd), ref.vega(1.1, F, K, sigma, T, rd))
+    
+    # Broadcasting a scalar market against a strike grid keeps the grid's shape
+    grid = np.linspace(0.9, 1.1, 12).reshape(3, 4)
+    assert backend.price(1.0, grid, 0.1, 0.5, 0.01, True).shape == (3, 4)
+
+def test_spline_vol_matches_surface(backend):
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    
+    ks = np.linspace(0.6, 1.5, 301)
+    vols = backend.spline_vol(ks, surface.spline.x, surface.spline.c)
+    assert np.allclose(vols, [surface.get_vol(k) for k in ks])
+    assert np.allclose(surface.get_vol(ks), vols)
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        backends.set_backend('fortran')
+
+def test_broadcast_inputs_reach_kernels_without_warnings(backend):
+    # A scalar broadcast against a one-element array (e.g. a single horizon) is
+    # already contiguous, so it used to reach the numba kernels as an
+    # np.broadcast_arrays view flagged warn-on-write, which numba warns about
+    K = np.array([1.05])
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert backend.price(1.0, K, 0.1, 0.5, 0.01, True).shape == (1,)
+        assert backend.vega(1.1, 1.0, K, 0.1, 0.5, 0.0).shape == (1,)
@@ -0,0 +1,90 @@
+import json
+import urllib.request
+import numpy as np
+import pytest
+from pricing import VanillaFxOptionPricer, VolatilitySurface, SMILE_MODELS
+import app
+from context import ContextPool, PricingContext
+from loadtest import LocalServer
+
+MARKET = (1.08, 0.04, 1.09, 0.5)
+QUOTES = (0.08, -0.005, 0.002, -0.01, 0.006)
+
+
+def fresh(model='spline'):
+    pricer = VanillaFxOptionPricer(*MARKET)
+    surface = VolatilitySurface(*QUOTES, model=model)
+    surface.construct_smile(pricer)
+    return pricer, surface
+
+
+@pytest.mark.parametrize('model', SMILE_MODELS)
+def test_reused_context_matches_fresh_objects(model):
+    context = PricingContext()
+    pricer, surface = context.load(*MARKET, *QUOTES, model=model)
+    ref_pricer, ref_surface = fresh(model)
+    assert surface.strikes == ref_surface.strikes
+    assert surface.get_vol(1.1) == ref_surface.get_vol(1.1)
+
+    for K in (1.0, 1.1, np.array([0.95, 1.05, 1.2])):
+        sens = context.model_sensitivities(pricer, surface, K, 'put')
+        expected = ref_pricer.calculate_model_sensitivities(K, 'put', ref_surface)
+        assert set(sens) == set(expected)
+        for name in expected:
+            np.testing.assert_array_equal(sens[name], expected[name])
+    # The base smile is left alone by the bumps
+    assert surface.sigma_atm == QUOTES[0]
+    assert surface.get_vol(1.1) == ref_surface.get_vol(1.1)
+
+    # Next request reuses the same objects
+    again = context.load(1.2, 0.01, 1.21, 1.0, 0.1, 0.0, 0.0, 0.0, 0.0)
+    assert again[0] is pricer and again[1] is surface
+    assert surface.get_vol(1.3) == pytest.approx(0.1)
+    assert context.requests == 2
+
+
+def test_curve_and_payoff_buffers():
+    context = PricingContext(n_curve=50)
+    curve = context.curve_strikes(0.8, 1.4)
+    np.testing.assert_array_equal(curve, np.linspace(0.8, 1.4, 50))
+    assert context.curve_strikes(0.9, 1.1) is curve
+
+    np.testing.assert_array_equal(context.payoff('call', 1.1, None, curve), np.maximum(curve - 1.1, 0))
+    np.testing.assert_array_equal(
+        context.payoff('risk_reversal', 1.0, 1.05, curve),
+        np.maximum(curve - 1.05, 0) - np.maximum(1.0 - curve, 0)
+    )
+    np.testing.assert_array_equal(
+        context.payoff('strangle', 1.0, 1.05, curve),
+        np.maximum(1.0 - curve, 0) + np.maximum(curve - 1.05, 0)
+    )
+    assert not context.payoff('butterfly', 1.0, 1.05, curve).any()
+
+
+def test_pool_reuses_contexts():
+    pool = ContextPool(max_idle=1)
+    with pool.borrow() as first:
+        with pool.borrow() as second:
+            assert second is not first
+    # Only one is kept idle, and it is handed out again
+    with pool.borrow() as again:
+        assert again is first or again is second
+    assert pool.created == 2
+
+
+def test_requests_on_separate_connections_share_a_context(monkeypatch):
+    seen = []
+    acquire = app.context_pool.acquire
+    monkeypatch.setattr(app.context_pool, 'acquire', lambda: seen.append(acquire()) or seen[-1])
+
+    payload = json.dumps({'type': 'call', 'strike': 1.1, 'forward': 1.09, 'spot_ref': 1.08}).encode()
+    with LocalServer() as server:
+        for _ in range(2):
+            # urllib opens a new connection (and werkzeug a new thread) per request
+            req = urllib.request.Request(server.url + '/calculate', data=payload,
+                                         headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(req) as response:
+                assert json.loads(response.read())['success']
+
+    assert len(seen) == 2
+    assert seen[0] is seen[1]
@@ -0,0 +1,54 @@
+import numpy as np
+from curves import YieldCurve, fx_forward
+from pricing import VanillaFxOptionPricer, VolatilitySurface
+
+def test_pillars_round_trip():
+    curve = YieldCurve([0.25, 1.0, 2.0], [0.03, 0.035, 0.04])
+    assert np.allclose(curve.zero_rate([0.25, 1.0, 2.0]), [0.03, 0.035, 0.04])
+    assert np.isclose(curve.discount_factor(1.0), np.exp(-0.035))
+    
+    # Flat zero rate extrapolation on both ends
+    assert np.isclose(curve.zero_rate(5.0), 0.04)
+    assert np.isclose(curve.zero_rate(0.1), 0.03)
+    
+    # Linear in log DF -> flat forward between pillars
+    assert np.isclose(curve.forward_rate(1.0, 1.5), curve.forward_rate(1.5, 2.0))
+
+def test_foreign_curve_from_forward_points():
+    domestic = YieldCurve([0.5, 1.0], [0.05, 0.05])
+    spot = 1.10
+    # 1y forward with rf = 3%: F = S * exp(0.02)
+    points = (spot * np.exp(0.02 * np.array([0.5, 1.0])) - spot) / 1e-4
+    foreign = YieldCurve.from_forward_points(spot, [0.5, 1.0], points, domestic, points_scale=1e-4)
+    
+    assert np.allclose(foreign.zero_rate([0.5, 1.0]), 0.03)
+    assert np.isclose(fx_forward(spot, domestic, foreign, 1.0), spot * np.exp(0.02))
+
+def test_multi_expiry_pricer_matches_scalar():
+    domestic = YieldCurve([0.25, 1.0, 2.0], [0.04, 0.045, 0.05])
+    foreign = YieldCurve([0.25, 1.0, 2.0], [0.02, 0.025, 0.02])
+    T = np.array([0.1, 0.5, 1.0, 1.5, 3.0])
+    K = np.array([1.05, 1.10, 1.12, 1.15, 1.2])
+    sigma = np.array([0.08, 0.09, 0.10, 0.11, 0.12])
+    
+    book = VanillaFxOptionPricer.from_curves(1.10, domestic, foreign, T)
+    prices = book.price(sigma, K, 'call')
+    deltas = book.calculate_delta(K, sigma, 'put')
+    vegas = book.calculate_vega(K, sigma)
+    
+    for i in range(len(T)):
+        single = VanillaFxOptionPricer(1.10, domestic.zero_rate(T[i]),
+                                       fx_forward(1.10, domestic, foreign, T[i]), T[i])
+        assert np.isclose(single.rf, foreign.zero_rate(T[i]))
+        assert np.isclose(prices[i], single.price(sigma[i], K[i], 'call'))
+        assert np.isclose(deltas[i], single.calculate_delta(K[i], sigma[i], 'put'))
+        assert np.isclose(vegas[i], single.calculate_vega(K[i], sigma[i]))
+
+def test_scalar_curve_pricer_builds_smile():
+    curve = YieldCurve.flat(0.01)
+    pricer = VanillaFxOptionPricer.from_curves(1.0, curve, curve, 1.0)
+    assert np.isclose(pricer.calculate_forward(), 1.0)
+    
+    surface = VolatilitySurface(0.10, 0.0, 0.0, 0.0, 0.0)
+    surface.construct_smile(pricer)
+    assert np.isclose(surface.get_vol(1.0), 0.10)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from pricing import VanillaFxOptionPricer, VolatilitySurface, SMILE_MODELS
+from density import implied_distribution, screen, strike_grid
+
+PRICER = VanillaFxOptionPricer(1.08, 0.04, 1.09, 0.5)
+SKEWED = (0.08, -0.005, 0.002, -0.01, 0.006)
+# 10d strangle below the 25d one: the smile bends down in the wings
+BENT = (0.10, 0.0, 0.03, 0.0, -0.01)
+
+
+def surface(quotes, model='spline'):
+    s = VolatilitySurface(*quotes, model=model)
+    s.construct_smile(PRICER)
+    return s
+
+
+@pytest.mark.parametrize('model', SMILE_MODELS)
+def test_vol_derivatives_match_finite_differences(model):
+    s = surface(SKEWED, model)
+    K = np.linspace(0.95, 1.25, 31)
+    h = 1e-4
+    vol, dvol, d2vol = s.get_vol_derivatives(K)
+    np.testing.assert_allclose(vol, s.get_vol(K), atol=1e-15)
+    np.testing.assert_allclose(dvol, (s.get_vol(K + h) - s.get_vol(K - h)) / (2 * h), atol=1e-6)
+    np.testing.assert_allclose(d2vol, (s.get_vol(K + h) - 2 * s.get_vol(K) + s.get_vol(K - h)) / h**2, atol=1e-4)
+
+
+@pytest.mark.parametrize('model', SMILE_MODELS)
+def test_prices_digitals_density_match_finite_differences(model):
+    s = surface(SKEWED, model)
+    dist = implied_distribution(PRICER, s, n=201)
+    K, h = dist.strikes, 1e-4
+    df = np.exp(-PRICER.rd * PRICER.T)
+
+    def call(k):
+        return PRICER.price(s.get_vol(k), k, 'call')
+
+    np.testing.assert_allclose(dist.call, call(K), atol=1e-14)
+    np.testing.assert_allclose(dist.put, PRICER.price(s.get_vol(K), K, 'put'), atol=1e-14)
+    np.testing.assert_allclose(dist.digital_call, -(call(K + h) - call(K - h)) / (2 * h), atol=1e-6)
+    np.testing.assert_allclose(dist.density, (call(K + h) - 2 * call(K) + call(K - h)) / h**2 / df, atol=1e-4)
+    np.testing.assert_allclose(dist.digital_call + dist.digital_put, df)
+
+
+def test_flat_smile_is_lognormal():
+    s = surface((0.1, 0.0, 0.0, 0.0, 0.0))
+    dist = implied_distribution(PRICER, s, n=801, n_std=8)
+    assert dist.coverage() == pytest.approx(1.0, abs=1e-6)
+    w = 0.1 * np.sqrt(PRICER.T)
+    median = PRICER.F * np.exp(-0.5 * w**2)
+    assert dist.quantile(0.5) == pytest.approx(median, rel=1e-5)
+    assert dist.probability_below(median) == pytest.approx(0.5, abs=1e-5)
+    np.testing.assert_allclose(dist.quantile([0.0, 1.0]), dist.strikes[[0, -1]])
+    assert dist.arbitrage_regions() == []
+
+
+def test_arbitrage_regions_and_screen():
+    bent = surface(BENT)
+    dist = implied_distribution(PRICER, bent)
+    regions = dist.arbitrage_regions()
+    assert regions
+    for lo, hi in regions:
+        inside = (dist.strikes >= lo) & (dist.strikes <= hi)
+        assert np.all(dist.density[inside] < 0)
+    # Quantiles stay monotone through the dips
+    assert np.all(np.diff(dist.quantile(np.linspace(0.01, 0.99, 50))) >= 0)
+
+    report = screen({'EURUSD': (PRICER, surface(SKEWED)), 'BENT': (PRICER, bent)})
+    assert report['EURUSD']['arbitrage_free']
+    assert not report['BENT']['arbitrage_free']
+    assert report['BENT']['min_density'] < 0
+
+    with pytest.raises(ValueError):
+        implied_distribution(PRICER, bent, strikes=strike_grid(PRICER, bent)[::-1])
@@ -0,0 +1,37 @@
+import json
+import random
+import pytest
+from loadtest import DEFAULT_MIX, LocalServer, ServerProcess, build_requests, make_payload, parse_mix, run
+
+def test_parse_mix_normalizes():
+    assert parse_mix("delta=3,strangle=1") == {'delta': 0.75, 'strangle': 0.25}
+    with pytest.raises(ValueError):
+        parse_mix("butterfly=1")
+
+def test_request_stream_is_reproducible():
+    assert build_requests(DEFAULT_MIX, 50, seed=7) == build_requests(DEFAULT_MIX, 50, seed=7)
+    
+    payload = make_payload('risk_reversal', random.Random(1))
+    assert payload['type'] == 'risk_reversal'
+    assert payload['strike_type'] == 'delta'
+
+def test_run_against_local_instance():
+    with LocalServer() as server:
+        report = run(server.url, parse_mix("price=1,strangle=1"), [1, 2], 12, warmup=2)
+    
+    json.dumps(report)  # machine readable as-is
+    assert [level['concurrency'] for level in report['levels']] == [1, 2]
+    for level in report['levels']:
+        assert level['requests'] == 12
+        assert level['error_rate'] == 0.0
+        assert level['p50_ms'] <= level['p95_ms'] <= level['p99_ms']
+        assert set(level['by_scenario']) <= {'price', 'strangle'}
+
+def test_run_against_server_process():
+    # The default setup: app.py in its own interpreter
+    with ServerProcess() as server:
+        report = run(server.url, parse_mix("delta=1"), [2], 8, warmup=1)
+        process = server.process
+    
+    assert report['levels'][0]['error_rate'] == 0.0
+    assert process.poll() is not None
@@ -0,0 +1,58 @@
+import threading
+import pytest
+from market_registry import MarketRegistry
+
+MARKET = {'spot_ref': 1.08, 'rd': 0.04, 'forward': 1.09, 'T': 0.5,
+          'atm': 0.08, 'rr25': -0.005, 'st25': 0.002, 'rr10': -0.01, 'st10': 0.006}
+
+
+def test_publish_versions_and_history():
+    registry = MarketRegistry(history=3)
+    for i in range(5):
+        snapshot = registry.publish('EURUSD', dict(MARKET, atm=0.08 + 0.001 * i))
+    assert snapshot.version == 5
+    assert registry.versions('EURUSD') == [3, 4, 5]
+    assert registry.get('EURUSD') is snapshot
+    assert registry.get('EURUSD', 3).surface.sigma_atm == pytest.approx(0.082)
+    assert registry.pairs() == ['EURUSD']
+
+    with pytest.raises(ValueError):
+        registry.get('EURUSD', 1)
+    with pytest.raises(ValueError):
+        registry.get('USDJPY')
+    with pytest.raises(ValueError):
+        registry.publish('EURUSD', {'atm': 0.1})
+
+
+def test_snapshot_is_immutable():
+    snapshot = MarketRegistry().publish('EURUSD', MARKET)
+    with pytest.raises(AttributeError):
+        snapshot.version = 7
+    with pytest.raises(TypeError):
+        snapshot.market['atm'] = 0.2
+
+
+def test_concurrent_readers_see_whole_snapshots():
+    registry = MarketRegistry(history=4)
+    registry.publish('EURUSD', MARKET)
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            s = registry.get('EURUSD')
+            # Quotes, pricer and smile always belong to the same publish
+            if s.surface.sigma_atm != s.market['atm'] or s.pricer.F != s.market['forward']:
+                errors.append(s.version)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(1, 50):
+        registry.publish('EURUSD', dict(MARKET, atm=0.08 + 0.0005 * i, forward=1.09 + 0.0001 * i))
+    stop.set()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert registry.get('EURUSD').version == 50
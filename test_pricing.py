@@ -1,4 +1,5 @@
 
+import pytest
 import numpy as np
 from pricing import VanillaFxOptionPricer, VolatilitySurface
 
@@ -141,6 +142,124 @@ def test_risk_reversal():
     
     print(f"RR Price: {expected_rr_price}")
 
+def test_spline_matches_scipy_natural_spline():
+    # The hand-rolled 5-knot fit must agree with scipy's natural CubicSpline
+    from scipy.interpolate import CubicSpline
+    
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    
+    reference = CubicSpline(surface.strikes, surface.vols, bc_type='natural')
+    ks = np.linspace(surface.strikes[0], surface.strikes[-1], 25)
+    assert np.allclose(surface.spline(ks), reference(ks))
+
+def test_update_quotes_matches_full_rebuild():
+    # Ticking a single quote in place should give the same smile as building from scratch
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    version = surface.version
+    k_10p = surface.strikes[0]
+    
+    dirty = surface.update_quotes(pricer, rr_25=0.02)
+    
+    # Only the 25d pillars are re-solved, the 10d wing is untouched
+    assert dirty == {'25p', '25c'}
+    assert surface.strikes[0] == k_10p
+    assert surface.version == version + 1
+    
+    fresh = VolatilitySurface(0.10, 0.02, 0.004, 0.03, 0.012)
+    fresh.construct_smile(pricer)
+    assert np.allclose(surface.strikes, fresh.strikes)
+    assert np.allclose(surface.vols, fresh.vols)
+    assert np.isclose(surface.get_vol(1.02), fresh.get_vol(1.02))
+    
+    # ATM moves every knot
+    assert surface.update_quotes(pricer, atm_vol=0.11) == {'10p', '25p', 'atm', '25c', '10c'}
+    
+    # Unchanged values do not refit or bump the version
+    version = surface.version
+    assert surface.update_quotes(pricer, atm_vol=0.11) == set()
+    assert surface.version == version
+
+def test_update_quotes_failure_leaves_smile_unchanged():
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    strikes, vols, version = list(surface.strikes), list(surface.vols), surface.version
+    
+    # Every key is checked before anything changes, so a retry still rebuilds
+    with pytest.raises(ValueError):
+        surface.update_quotes(pricer, atm_vol=0.2, bogus=1)
+    assert surface.sigma_atm == 0.10
+    
+    # A rebuild that fails half way rolls the quotes and knots back
+    with pytest.raises(AttributeError):
+        surface.update_quotes(None, atm_vol=0.2)
+    assert surface.sigma_atm == 0.10
+    assert surface.strikes == strikes and surface.vols == vols
+    assert surface.version == version
+    
+    assert surface.update_quotes(pricer, atm_vol=0.2) == {'10p', '25p', 'atm', '25c', '10c'}
+    fresh = VolatilitySurface(0.2, 0.015, 0.004, 0.03, 0.012)
+    fresh.construct_smile(pricer)
+    assert np.allclose(surface.strikes, fresh.strikes)
+
+def test_vanna_volga_smile():
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    spline = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    spline.construct_smile(pricer)
+    vv = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012, model='vanna_volga')
+    vv.construct_smile(pricer)
+    
+    assert vv.spline is None
+    # Same knots, and the VV smile reprices the 25d and ATM pillars exactly
+    assert np.allclose(vv.strikes, spline.strikes)
+    for name in ('25p', 'atm', '25c'):
+        k, v = vv._knots[name]
+        assert np.isclose(vv.get_vol(k), v)
+    
+    # Array lookups agree with scalar ones for both models, wings included
+    ks = np.linspace(0.7, 1.4, 41)
+    for surface in (spline, vv):
+        assert np.allclose(surface.get_vol(ks), [surface.get_vol(k) for k in ks])
+    
+    # Unlike the clamped spline, VV keeps curving in the wings
+    assert spline.get_vol(0.7) == spline.get_vol(0.72)
+    assert vv.get_vol(0.7) > vv.get_vol(0.72) > 0
+    
+    # Bumped surfaces in the model sensitivities keep the model
+    sens = pricer.calculate_model_sensitivities(1.0, 'call', vv)
+    assert sens['atm'] > 0
+    assert sens['rr10'] == 0.0  # 10d quotes do not enter the VV smile
+
+def test_price_chain_matches_single_pricing():
+    from pricing import price_chain
+    
+    pricer = VanillaFxOptionPricer(1.0, 0.01, 1.01, 0.5)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    
+    deltas = [0.05, 0.10, 0.25, 0.50, 0.75]
+    chain = price_chain(pricer, surface, 'put', deltas=deltas)
+    for i, d in enumerate(deltas):
+        k = pricer.solve_strike_for_delta(d, 'put', surface)
+        vol = surface.get_vol(k)
+        assert np.isclose(chain['strike'][i], k)
+        assert np.isclose(chain['price'][i], pricer.price(vol, k, 'put'))
+        assert np.isclose(chain['delta'][i], -d)
+        assert np.isclose(chain['vega'][i], pricer.calculate_vega(k, vol))
+        
+        single = pricer.calculate_model_sensitivities(k, 'put', surface)
+        for name in single:
+            assert np.isclose(chain['model_vega'][name][i], single[name], rtol=1e-6, atol=1e-8)
+    
+    strikes = np.linspace(0.85, 1.2, 8)
+    chain = price_chain(pricer, surface, 'call', strikes=strikes, sensitivities=False)
+    assert 'model_vega' not in chain
+    assert np.allclose(chain['price'], [pricer.price(surface.get_vol(k), k, 'call') for k in strikes])
+
 if __name__ == "__main__":
     test_forward_return()
     test_atm_price()
@@ -149,4 +268,9 @@ if __name__ == "__main__":
     test_delta_solver()
     test_vega_calculations()
     test_risk_reversal()
+    test_spline_matches_scipy_natural_spline()
+    test_update_quotes_matches_full_rebuild()
+    test_update_quotes_failure_leaves_smile_unchanged()
+    test_vanna_volga_smile()
+    test_price_chain_matches_single_pricing()
     print("All verification tests passed!")
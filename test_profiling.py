@@ -0,0 +1,89 @@
+import unittest
+import json
+from app import app
+import profiling
+from profiling import ProfileStore
+
+PAYLOAD = {
+    'spot_ref': 1.0, 'rd': 0.01, 'forward': 1.01, 'T': 0.5,
+    'atm': 0.10, 'rr25': 0.01, 'st25': 0.003, 'rr10': 0.02, 'st10': 0.01,
+    'type': 'call', 'strike_type': 'delta', 'strike': 0.25
+}
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.saved = {k: app.config[k] for k in ('PROFILE_ADMIN_TOKEN', 'PROFILE_SLOW_MS')}
+        app.config['PROFILE_ADMIN_TOKEN'] = 'secret'
+        app.config['PROFILE_SLOW_MS'] = None
+        self.store = app.extensions['profile_store']
+        self.store.clear()
+        self.app = app.test_client()
+
+    def tearDown(self):
+        app.config.update(self.saved)
+        app.extensions['profile_store'] = self.store
+
+    def _post(self, headers):
+        return self.app.post('/calculate', data=json.dumps(PAYLOAD),
+                             content_type='application/json', headers=headers)
+
+    def test_profile_requires_admin_token(self):
+        response = self._post({'X-Profile': '1', 'X-Admin-Token': 'wrong'})
+        self.assertTrue(json.loads(response.data)['success'])
+        self.assertNotIn('X-Profile-Id', response.headers)
+        
+        self.assertEqual(self.app.get('/admin/profiles').status_code, 403)
+        self.assertEqual(self.app.get('/admin/profiles', headers={'X-Admin-Token': 'wrong'}).status_code, 403)
+
+    def test_on_demand_profile(self):
+        admin = {'X-Admin-Token': 'secret'}
+        response = self._post(dict(admin, **{'X-Profile': '1'}))
+        self.assertTrue(json.loads(response.data)['success'])
+        report_id = response.headers['X-Profile-Id']
+        
+        report = json.loads(self.app.get(f'/admin/profiles/{report_id}', headers=admin).data)['profile']
+        self.assertEqual(report['trigger'], 'admin')
+        self.assertEqual(report['payload'], PAYLOAD)
+        functions = [row['function'] for row in report['top_cumulative']]
+        self.assertIn('solve_strike_for_delta', functions)
+        retained = report['top_retained_allocations']
+        self.assertTrue(retained)
+        self.assertFalse([row for row in retained if 'profiling.py' in row['location']])
+        
+        # Allocations are process wide; nothing else was running alongside this one
+        self.assertEqual(report['allocation_scope'], 'process')
+        self.assertEqual(report['concurrent_requests'], 0)
+        
+        # Cumulative time is sorted descending
+        cum = [row['cumtime_ms'] for row in report['top_cumulative']]
+        self.assertEqual(cum, sorted(cum, reverse=True))
+
+    def test_overlapping_requests_are_counted(self):
+        # Another request in flight during the capture shows up in the report
+        profiling._activity.enter()
+        try:
+            response = self._post({'X-Admin-Token': 'secret', 'X-Profile': '1'})
+        finally:
+            profiling._activity.leave()
+        report = self.store.get(int(response.headers['X-Profile-Id']))
+        self.assertEqual(report['concurrent_requests'], 1)
+
+    def test_slow_requests_are_captured_with_bounded_storage(self):
+        app.config['PROFILE_SLOW_MS'] = 0.0  # everything counts as slow
+        store = app.extensions['profile_store'] = ProfileStore(maxlen=3)
+        for i in range(5):
+            response = self._post({})
+            self.assertTrue(json.loads(response.data)['success'])
+            # The replay only runs once the response has been sent and closed
+            self.assertEqual(len(store.summaries()), min(i, 3))
+            response.close()
+        
+        summaries = json.loads(self.app.get('/admin/profiles', headers={'X-Admin-Token': 'secret'}).data)['profiles']
+        self.assertEqual(len(summaries), 3)
+        self.assertEqual([s['id'] for s in summaries], [3, 4, 5])
+        self.assertTrue(all(s['trigger'] == 'slow' for s in summaries))
+        # The replay runs after the original request has finished
+        self.assertEqual(store.get(5)['concurrent_requests'], 0)
+
+if __name__ == '__main__':
+    unittest.main()
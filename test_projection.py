@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from pricing import VanillaFxOptionPricer, VolatilitySurface
+from projection import project
+
+def make_market():
+    pricer = VanillaFxOptionPricer(1.0, 0.03, 1.01, 1.0)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012)
+    surface.construct_smile(pricer)
+    return pricer, surface
+
+def test_sticky_strike_matches_per_horizon_pricers():
+    pricer, surface = make_market()
+    horizons = np.linspace(0.0, 0.9, 10)
+    result = project(pricer, surface, 'risk_reversal', 0.95, horizons, strike_2=1.08)
+    
+    for i, t in enumerate(horizons):
+        tau = pricer.T - t
+        fwd = pricer.S * np.exp((pricer.rd - pricer.rf) * tau)
+        single = VanillaFxOptionPricer(pricer.S, pricer.rd, fwd, tau)
+        put = single.price(surface.get_vol(0.95), 0.95, 'put')
+        call = single.price(surface.get_vol(1.08), 1.08, 'call')
+        assert np.isclose(result['value'][i], call - put)
+        vega = single.calculate_vega(1.08, surface.get_vol(1.08)) - single.calculate_vega(0.95, surface.get_vol(0.95))
+        assert np.isclose(result['vega'][i], vega)
+    
+    # Today's horizon reproduces today's forward
+    assert np.isclose(result['forward'][0], pricer.calculate_forward())
+
+def test_roll_down_to_expiry():
+    pricer, surface = make_market()
+    result = project(pricer, surface, 'strangle', 0.9, [0.0, 0.5, 0.99, 1.0], strike_2=1.1)
+    
+    # OTM strangle decays to nothing, vega rolls off
+    assert np.all(np.diff(result['value']) < 0)
+    assert result['value'][-1] == 0.0
+    assert result['vega'][-1] == 0.0
+    assert result['vega'][0] > result['vega'][2]
+    
+    # ITM call at expiry is worth intrinsic with unit delta
+    expired = project(pricer, surface, 'call', 0.9, [1.0])
+    assert np.isclose(expired['value'][0], 0.1)
+    assert expired['delta'][0] == 1.0
+
+def test_sticky_delta_dynamics():
+    pricer, surface = make_market()
+    horizons = [0.0, 0.5, 0.75]
+    sticky_strike = project(pricer, surface, 'put', 0.93, horizons)
+    sticky_delta = project(pricer, surface, 'put', 0.93, horizons, dynamics='sticky_delta')
+    
+    # Identical today; an OTM put slides further into the wing as time passes
+    assert np.isclose(sticky_delta['leg_vols'][0, 0], sticky_strike['leg_vols'][0, 0])
+    assert np.all(np.diff(sticky_delta['leg_vols'][0]) > 0)
+    assert np.all(np.diff(sticky_strike['leg_vols'][0]) == 0)
+
+@pytest.mark.parametrize('model', ['spline', 'vanna_volga'])
+def test_sticky_delta_near_expiry(model):
+    pricer = VanillaFxOptionPricer(1.0, 0.03, 1.01, 1.0)
+    surface = VolatilitySurface(0.10, 0.015, 0.004, 0.03, 0.012, model=model)
+    surface.construct_smile(pricer)
+    horizons = [0.9, 0.99999, 0.999999999]
+    result = project(pricer, surface, 'strangle', 0.9, horizons, strike_2=1.1, dynamics='sticky_delta')
+    
+    # The equivalent strike stays on today's smile, so the vols stay finite
+    assert np.all(np.isfinite(result['leg_vols']))
+    assert np.all(np.isfinite(result['value']))
+    assert np.isclose(result['value'][-1], 0.0)
+
+def test_rejects_bad_inputs():
+    pricer, surface = make_market()
+    with pytest.raises(ValueError):
+        project(pricer, surface, 'call', 1.0, [1.5])
+    with pytest.raises(ValueError):
+        project(pricer, surface, 'call', 1.0, [0.5], dynamics='sticky_vol')
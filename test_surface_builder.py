@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+import numpy as np
+from pricing import VanillaFxOptionPricer, VolatilitySurface
+from surface_builder import build_surfaces, BulkSurfaces
+
+def make_quotes():
+    quotes = []
+    for p, (spot, fwd_pts) in enumerate([(1.08, 0.01), (150.0, -4.0), (1.27, 0.002)]):
+        for t, T in enumerate([1 / 12, 0.25, 0.5, 1.0]):
+            quotes.append({
+                'pair': f"PAIR{p}", 'tenor': f"{t}M", 'spot_ref': spot, 'rd': 0.03,
+                'forward': spot + fwd_pts * T, 'T': T, 'atm': 0.08 + 0.01 * t,
+                'rr25': -0.004 * (p - 1), 'st25': 0.003, 'rr10': -0.008 * (p - 1), 'st10': 0.009,
+            })
+    return quotes
+
+def test_bulk_build_matches_construct_smile():
+    quotes = make_quotes()
+    with build_surfaces(quotes, workers=1) as bulk:
+        assert bulk.failed == []
+        for q in quotes:
+            pricer = VanillaFxOptionPricer(q['spot_ref'], q['rd'], q['forward'], q['T'])
+            ref = VolatilitySurface(q['atm'], q['rr25'], q['st25'], q['rr10'], q['st10'])
+            ref.construct_smile(pricer)
+            
+            surface = bulk.surface((q['pair'], q['tenor']))
+            assert np.allclose(surface.strikes, ref.strikes)
+            for k in np.linspace(ref.strikes[0] * 0.9, ref.strikes[-1] * 1.1, 11):
+                assert np.isclose(surface.get_vol(k), ref.get_vol(k))
+            
+            # Rebuilt surfaces still support in-place updates
+            surface.update_quotes(pricer, rr_25=0.0)
+
+def test_parallel_build_is_deterministic():
+    quotes = make_quotes()
+    with build_surfaces(quotes, workers=1) as serial, build_surfaces(quotes, workers=3, chunk_size=2) as parallel:
+        assert np.array_equal(serial.data, parallel.data)
+        assert serial.keys == parallel.keys
+
+def test_unsolvable_rows_are_flagged():
+    quotes = make_quotes()[:2]
+    # Forward so far below spot that the 50d call strike has no solution
+    quotes[1] = dict(quotes[1], forward=quotes[1]['spot_ref'] * 0.3, T=1.0)
+    with build_surfaces(quotes, workers=1) as bulk:
+        assert bulk.failed == [(quotes[1]['pair'], quotes[1]['tenor'])]
+
+def test_attach_from_another_process():
+    # A separate interpreter attaches, reads and exits; the block must survive it
+    quotes = make_quotes()
+    with build_surfaces(quotes, workers=1) as bulk:
+        reader = (
+            "from surface_builder import BulkSurfaces\n"
+            f"bulk = BulkSurfaces.attach({bulk.name!r}, {bulk.keys!r})\n"
+            "print(repr(float(bulk.strikes[0, 2])))\n"
+            "bulk.close()\n"
+        )
+        result = subprocess.run([sys.executable, '-c', reader], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        assert float(result.stdout) == bulk.strikes[0, 2]
+        assert 'resource_tracker' not in result.stderr
+        
+        # Still attachable by name after the reader is gone
+        again = BulkSurfaces.attach(bulk.name, bulk.keys)
+        assert np.array_equal(again.strikes, bulk.strikes)
+        again.close()
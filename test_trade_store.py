@@ -0,0 +1,72 @@
+import numpy as np
+from datetime import date
+from pricing import VanillaFxOptionPricer, VolatilitySurface, price_structure
+from trade_store import TradeStore
+
+MARKET = {
+    'EURUSD': {'spot_ref': 1.08, 'rd': 0.04, 'forward': 1.09, 'atm': 0.08,
+               'rr25': -0.005, 'st25': 0.002, 'rr10': -0.01, 'st10': 0.006},
+    'USDJPY': {'spot_ref': 150.0, 'rd': 0.001, 'forward': 146.0, 'atm': 0.10,
+               'rr25': -0.01, 'st25': 0.003, 'rr10': -0.02, 'st10': 0.01},
+}
+
+def market_data(trade):
+    # Year fraction from a fixed valuation date keeps the test deterministic
+    T = (date.fromisoformat(trade['expiry']) - date(2026, 1, 2)).days / 365.0
+    return dict(MARKET[trade['pair']], T=T)
+
+def make_store():
+    store = TradeStore()
+    store.add_trades([
+        {'pair': 'EURUSD', 'expiry': '2026-02-15', 'structure': 'call', 'strike': 1.10},
+        {'pair': 'EURUSD', 'expiry': '2026-03-20', 'structure': 'strangle', 'strike_type': 'delta', 'strike': 0.25},
+        {'pair': 'EURUSD', 'expiry': date(2026, 9, 18), 'structure': 'put', 'strike': 1.05, 'notional': 2.0},
+        {'pair': 'USDJPY', 'expiry': '2026-03-01', 'structure': 'risk_reversal', 'strike': 140.0, 'strike_2': 155.0},
+        {'pair': 'GBPUSD', 'expiry': '2026-03-01', 'structure': 'call', 'strike': 1.30},
+    ])
+    return store
+
+def test_range_queries():
+    store = make_store()
+    
+    near = store.query(pair='EURUSD', expiry_to='2026-04-02')
+    assert [t['structure'] for t in near] == ['call', 'strangle']
+    
+    assert store.count(expiry_from='2026-03-01', expiry_to='2026-03-31') == 3
+    assert store.count(structure='call') == 2
+    assert store.count() == 5
+
+def test_bulk_revaluation():
+    store = make_store()
+    
+    # Tiny chunks to exercise several batched transactions
+    assert store.revalue(market_data, chunk_size=2) == 5
+    
+    vals = {v['trade_id']: v for v in store.valuations()}
+    assert len(vals) == 5
+    
+    # GBPUSD has no market data, so it is recorded as an error rather than aborting the run
+    gbp = store.query(pair='GBPUSD')[0]
+    assert vals[gbp['id']]['price'] is None
+    assert 'GBPUSD' in vals[gbp['id']]['error']
+    
+    # Results agree with pricing the trade directly
+    put = store.query(structure='put')[0]
+    md = market_data(put)
+    pricer = VanillaFxOptionPricer(md['spot_ref'], md['rd'], md['forward'], md['T'])
+    surface = VolatilitySurface(md['atm'], md['rr25'], md['st25'], md['rr10'], md['st10'])
+    surface.construct_smile(pricer)
+    price, vol, _, _ = price_structure(pricer, surface, 'put', 'price', 1.05)
+    
+    assert np.isclose(vals[put['id']]['price'], 2.0 * price)
+    assert np.isclose(vals[put['id']]['vol'], vol)
+    assert set(vals[put['id']]['model_vega']) == {'atm', 'rr25', 'st25', 'rr10', 'st10'}
+    
+    # Model vegas from the group's shared bumped smiles match a fresh per-trade bump
+    direct = pricer.calculate_model_sensitivities(1.05, 'put', surface)
+    for name, sens in direct.items():
+        assert np.isclose(vals[put['id']]['model_vega'][name], 2.0 * sens)
+    
+    # Filters restrict what gets revalued
+    assert store.revalue(market_data, pair='USDJPY', sensitivities=False) == 1
+    assert len(store.valuations(pair='USDJPY')) == 1
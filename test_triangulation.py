@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+from pricing import VanillaFxOptionPricer, VolatilitySurface
+from triangulation import (
+    CrossSurfaceCache, cross_pillar_vols, cross_pricer, pillar_vols, triangulate, triangulate_many
+)
+
+EURUSD = VanillaFxOptionPricer(1.08, 0.045, 1.0895, 0.5)
+USDJPY = VanillaFxOptionPricer(150.0, 0.001, 146.9, 0.5)
+GBPUSD = VanillaFxOptionPricer(1.27, 0.045, 1.2735, 0.5)
+
+
+def leg(pricer, *quotes):
+    surface = VolatilitySurface(*quotes)
+    surface.construct_smile(pricer)
+    return surface
+
+
+def test_flat_legs_give_textbook_cross_vol():
+    eur = leg(EURUSD, 0.08, 0.0, 0.0, 0.0, 0.0)
+    jpy = leg(USDJPY, 0.10, 0.0, 0.0, 0.0, 0.0)
+    pricer = cross_pricer(EURUSD, USDJPY)
+    assert pricer.F == pytest.approx(1.0895 * 146.9)
+    assert pricer.rd == USDJPY.rd
+
+    cross = triangulate(eur, jpy, 0.3, pricer)
+    expected = np.sqrt(0.08**2 + 0.10**2 + 2 * 0.3 * 0.08 * 0.10)
+    assert cross.sigma_atm == pytest.approx(expected)
+    assert cross.rr_25 == pytest.approx(0.0, abs=1e-15)
+    # Usable like any surface: delta strikes and prices on the cross market
+    assert cross.get_vol(pricer.F * 1.1) == pytest.approx(expected)
+    assert pricer.price(cross.get_vol(pricer.F), pricer.F, 'call') > 0
+
+
+def test_ratio_swaps_wings_of_the_denominator():
+    eur = leg(EURUSD, 0.08, -0.01, 0.002, -0.02, 0.006)
+    gbp = leg(GBPUSD, 0.09, -0.01, 0.002, -0.02, 0.006)
+    vols = cross_pillar_vols(pillar_vols(eur), pillar_vols(gbp), 0.6, 'ratio')
+    v1, v2 = pillar_vols(eur), pillar_vols(gbp)[::-1]
+    np.testing.assert_allclose(vols, np.sqrt(v1**2 + v2**2 - 1.2 * v1 * v2))
+    pricer = cross_pricer(EURUSD, GBPUSD, 'ratio')
+    assert pricer.rd == pytest.approx(GBPUSD.rf)
+    cross = triangulate(eur, gbp, 0.6, pricer, 'ratio')
+    assert cross.sigma_atm == pytest.approx(np.sqrt(0.08**2 + 0.09**2 - 1.2 * 0.08 * 0.09))
+
+    with pytest.raises(ValueError):
+        cross_pillar_vols(v1, v2, 1.5)
+    with pytest.raises(ValueError):
+        cross_pillar_vols(v1, v2, 0.5, 'sum')
+
+
+def test_triangulate_many_matches_single_builds():
+    rng = np.random.default_rng(3)
+    legs_1, legs_2, pricers = [], [], []
+    for _ in range(20):
+        legs_1.append(leg(EURUSD, *rng.uniform([0.06, -0.01, 0.001, -0.02, 0.003], [0.1, 0.01, 0.004, 0.02, 0.01])))
+        legs_2.append(leg(USDJPY, *rng.uniform([0.08, -0.02, 0.001, -0.04, 0.003], [0.12, 0.0, 0.004, 0.0, 0.01])))
+        pricers.append(cross_pricer(EURUSD, USDJPY))
+    rhos = rng.uniform(-0.5, 0.8, 20)
+
+    batch = triangulate_many(legs_1, legs_2, rhos, pricers)
+    ks = pricers[0].F * np.linspace(0.8, 1.2, 25)
+    for surface, l1, l2, rho, pricer in zip(batch, legs_1, legs_2, rhos, pricers):
+        single = triangulate(l1, l2, rho, pricer)
+        np.testing.assert_allclose(surface.strikes, single.strikes, rtol=1e-12)
+        np.testing.assert_allclose(surface.get_vol(ks), single.get_vol(ks), rtol=1e-12)
+
+
+def test_cache_invalidates_on_leg_version():
+    eur = leg(EURUSD, 0.08, -0.005, 0.002, -0.01, 0.006)
+    jpy = leg(USDJPY, 0.10, -0.02, 0.003, -0.04, 0.009)
+    pricer = cross_pricer(EURUSD, USDJPY)
+    cache = CrossSurfaceCache(maxsize=2)
+
+    first = cache.get(eur, jpy, 0.3, pricer)
+    assert cache.get(eur, jpy, 0.3, pricer) is first
+    assert cache.get(eur, jpy, 0.4, pricer) is not first
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    jpy.update_quotes(USDJPY, atm_vol=0.12)
+    rebuilt = cache.get(eur, jpy, 0.3, pricer)
+    assert rebuilt is not first
+    assert rebuilt.sigma_atm > first.sigma_atm
+    assert len(cache) == 2
+
+    # Batch lookup only rebuilds what is stale
+    eur.update_quotes(EURUSD, rr_25=0.0)
+    surfaces = cache.get_many([eur, eur], [jpy, jpy], [0.3, 0.4], [pricer, pricer])
+    assert cache.misses == 5
+    assert cache.get_many([eur], [jpy], 0.3, [pricer])[0] is surfaces[0]
@@ -0,0 +1,203 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+from pricing import VanillaFxOptionPricer, VolatilitySurface, price_structure, structure_legs
+
+# Embedded, file-backed (or in-memory) book of trades.
+# Trades are immutable rows; valuations live in their own table keyed by trade id
+# so a revaluation never rewrites the rows it is scanning.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY,
+    pair TEXT NOT NULL,
+    expiry TEXT NOT NULL,          -- ISO date, sorts lexically
+    structure TEXT NOT NULL,       -- call, put, strangle, risk_reversal
+    strike_type TEXT NOT NULL DEFAULT 'price',
+    strike REAL NOT NULL,
+    strike_2 REAL,
+    notional REAL NOT NULL DEFAULT 1.0
+);
+CREATE INDEX IF NOT EXISTS idx_trades_pair_expiry ON trades (pair, expiry);
+CREATE INDEX IF NOT EXISTS idx_trades_structure_expiry ON trades (structure, expiry);
+CREATE INDEX IF NOT EXISTS idx_trades_expiry ON trades (expiry);
+
+CREATE TABLE IF NOT EXISTS valuations (
+    trade_id INTEGER PRIMARY KEY REFERENCES trades (id),
+    valued_at TEXT NOT NULL,
+    price REAL,
+    vol REAL,
+    strike_used REAL,
+    strike_2_used REAL,
+    vega REAL,
+    model_vega TEXT,               -- JSON {atm, rr25, st25, rr10, st10}
+    error TEXT
+);
+"""
+
+TRADE_COLUMNS = ('id', 'pair', 'expiry', 'structure', 'strike_type', 'strike', 'strike_2', 'notional')
+
+
+def _expiry(value):
+    # Accept date/datetime objects or ISO strings
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    return str(value)[:10]
+
+
+class TradeStore:
+    def __init__(self, path=':memory:'):
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_trades(self, trades):
+        # trades: iterable of dicts with pair, expiry, structure, strike and
+        # optionally strike_type, strike_2, notional. Inserted in one transaction.
+        rows = (
+            (t['pair'], _expiry(t['expiry']), t['structure'], t.get('strike_type', 'price'),
+             float(t['strike']), t.get('strike_2'), float(t.get('notional', 1.0)))
+            for t in trades
+        )
+        with self.conn:
+            cur = self.conn.executemany(
+                "INSERT INTO trades (pair, expiry, structure, strike_type, strike, strike_2, notional) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+        return cur.rowcount
+
+    def add_trade(self, pair, expiry, structure, strike, strike_2=None, strike_type='price', notional=1.0):
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO trades (pair, expiry, structure, strike_type, strike, strike_2, notional) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (pair, _expiry(expiry), structure, strike_type, float(strike), strike_2, float(notional))
+            )
+        return cur.lastrowid
+
+    def _where(self, pair=None, structure=None, expiry_from=None, expiry_to=None):
+        # Every filter maps onto one of the indexes above; expiry bounds are inclusive
+        clauses, params = [], []
+        if pair is not None:
+            clauses.append("t.pair = ?")
+            params.append(pair)
+        if structure is not None:
+            clauses.append("t.structure = ?")
+            params.append(structure)
+        if expiry_from is not None:
+            clauses.append("t.expiry >= ?")
+            params.append(_expiry(expiry_from))
+        if expiry_to is not None:
+            clauses.append("t.expiry <= ?")
+            params.append(_expiry(expiry_to))
+        sql = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        return sql, params
+
+    def query(self, **filters):
+        # e.g. store.query(pair='EURUSD', expiry_to=date.today() + timedelta(days=90))
+        where, params = self._where(**filters)
+        cur = self.conn.execute(
+            f"SELECT {', '.join('t.' + c for c in TRADE_COLUMNS)} FROM trades t{where} "
+            "ORDER BY t.pair, t.expiry, t.id", params
+        )
+        return [dict(row) for row in cur]
+
+    def count(self, **filters):
+        where, params = self._where(**filters)
+        return self.conn.execute(f"SELECT COUNT(*) FROM trades t{where}", params).fetchone()[0]
+
+    def valuations(self, **filters):
+        where, params = self._where(**filters)
+        cur = self.conn.execute(
+            f"SELECT v.* FROM valuations v JOIN trades t ON t.id = v.trade_id{where} ORDER BY v.trade_id",
+            params
+        )
+        results = []
+        for row in cur:
+            row = dict(row)
+            if row['model_vega'] is not None:
+                row['model_vega'] = json.loads(row['model_vega'])
+            results.append(row)
+        return results
+
+    def _value_trade(self, trade, pricer, surface, bumped):
+        # bumped: the group's build_bumped_surfaces result, None skips sensitivities
+        price, vol, strike, strike_2 = price_structure(
+            pricer, surface, trade['structure'], trade['strike_type'], trade['strike'], trade['strike_2']
+        )
+        notional = trade['notional']
+        vega = None
+        model_vega = None
+        if bumped is not None:
+            vega = 0.0
+            model_vega = dict.fromkeys(('atm', 'rr25', 'st25', 'rr10', 'st10'), 0.0)
+            for sign, option_type, k in structure_legs(trade['structure'], strike, strike_2):
+                vega += sign * pricer.calculate_vega(k, surface.get_vol(k))
+                for name, sens in pricer.calculate_model_sensitivities(k, option_type, surface, bumped).items():
+                    model_vega[name] += sign * notional * float(sens)
+            vega = notional * float(vega)
+            model_vega = json.dumps(model_vega)
+        return (notional * float(price), float(vol), float(strike),
+                None if strike_2 is None else float(strike_2), vega, model_vega, None)
+
+    def revalue(self, market_data, chunk_size=500, sensitivities=True, **filters):
+        # Stream matching trades through the pricer and write results back per chunk.
+        # market_data(trade) -> dict with pricing.MARKET_FIELDS for that trade's pair/expiry.
+        # Trades come back ordered by (pair, expiry) so the smile, and the five bumped
+        # smiles behind the model vegas, are built once per group.
+        # Failed trades are stored with their error message instead of aborting the run.
+        where, params = self._where(**filters)
+        reader = self.conn.cursor()
+        reader.execute(
+            f"SELECT {', '.join('t.' + c for c in TRADE_COLUMNS)} FROM trades t{where} "
+            "ORDER BY t.pair, t.expiry, t.id", params
+        )
+        valued_at = datetime.now(timezone.utc).isoformat()
+        group_key, pricer, surface, bumped = None, None, None, None
+        total = 0
+
+        while True:
+            chunk = reader.fetchmany(chunk_size)
+            if not chunk:
+                break
+
+            rows = []
+            for trade in chunk:
+                trade = dict(trade)
+                try:
+                    key = (trade['pair'], trade['expiry'])
+                    if key != group_key:
+                        group_key, pricer, surface, bumped = key, None, None, None
+                        md = market_data(trade)
+                        group_pricer = VanillaFxOptionPricer(md['spot_ref'], md['rd'], md['forward'], md['T'])
+                        group_surface = VolatilitySurface(md['atm'], md['rr25'], md['st25'], md['rr10'], md['st10'])
+                        group_surface.construct_smile(group_pricer)
+                        if sensitivities:
+                            bumped = group_pricer.build_bumped_surfaces(group_surface)
+                        # Only a fully built group is used, failures leave surface None
+                        pricer, surface = group_pricer, group_surface
+                    if surface is None:
+                        raise ValueError(f"No market data for {trade['pair']} {trade['expiry']}")
+                    result = self._value_trade(trade, pricer, surface, bumped)
+                except Exception as e:
+                    result = (None, None, None, None, None, None, str(e))
+                rows.append((trade['id'], valued_at) + result)
+
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO valuations "
+                    "(trade_id, valued_at, price, vol, strike_used, strike_2_used, vega, model_vega, error) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            total += len(rows)
+
+        return total
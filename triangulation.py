@@ -0,0 +1,209 @@
+from collections import OrderedDict
+import numpy as np
+from scipy.special import ndtri
+from pricing import VanillaFxOptionPricer, VolatilitySurface, SMILE_KNOTS, SMILE_MODELS
+
+# Cross smiles implied by two USD legs.
+#
+# Orientation of the cross relative to the legs (both quoted against USD):
+#   product  leg1 * leg2, e.g. EURUSD * USDJPY = EURJPY
+#   ratio    leg1 / leg2, e.g. EURUSD / GBPUSD = EURGBP
+# correlation is between the log returns of leg1 and leg2 as quoted.
+#
+# Pillars are matched by delta: the cross vol at each SMILE_KNOTS pillar is
+#   sigma_x^2 = sigma_1^2 + sigma_2^2 +/- 2 rho sigma_1 sigma_2   (+ product, - ratio)
+# using the leg vols at the same pillar. Under 'ratio' a call on the cross is a
+# put on leg2, so leg2's put and call wings swap. The result is re-expressed as
+# ATM / RR / ST quotes and built into an ordinary VolatilitySurface on the cross
+# market, so it can go anywhere a directly quoted surface can.
+
+ORIENTATIONS = ('product', 'ratio')
+
+KNOT_NAMES = [knot[0] for knot in SMILE_KNOTS]
+# SMILE_KNOTS runs 10p, 25p, atm, 25c, 10c: reversing it swaps puts and calls
+_MIRROR = list(reversed(range(len(SMILE_KNOTS))))
+
+
+def _check_orientation(orientation):
+    if orientation not in ORIENTATIONS:
+        raise ValueError(f"Unknown cross orientation: {orientation}")
+
+
+def pillar_vols(surface):
+    # Quote-implied vols in SMILE_KNOTS order (no strikes needed)
+    return np.array([surface._knot_vol(name) for name in KNOT_NAMES])
+
+
+def cross_pillar_vols(vols_1, vols_2, correlation, orientation='product'):
+    # vols_*: (..., 5) pillar vols in SMILE_KNOTS order, correlation broadcasts over '...'
+    _check_orientation(orientation)
+    vols_1 = np.asarray(vols_1, dtype=float)
+    vols_2 = np.asarray(vols_2, dtype=float)
+    rho = np.asarray(correlation, dtype=float)[..., None]
+    if np.any(np.abs(rho) > 1):
+        raise ValueError("Correlation must lie in [-1, 1]")
+    if orientation == 'ratio':
+        vols_2 = vols_2[..., _MIRROR]
+        rho = -rho
+    var = vols_1**2 + vols_2**2 + 2.0 * rho * vols_1 * vols_2
+    return np.sqrt(np.maximum(var, 0.0))
+
+
+def quotes_from_pillars(vols):
+    # Pillar vols (..., 5) -> ATM / RR / ST quotes, the inverse of VolatilitySurface._knot_vol
+    v = dict(zip(KNOT_NAMES, np.moveaxis(np.asarray(vols, dtype=float), -1, 0)))
+    return {
+        'atm_vol': v['atm'],
+        'rr_25': v['25c'] - v['25p'],
+        'st_25': 0.5 * (v['25c'] + v['25p']) - v['atm'],
+        'rr_10': v['10c'] - v['10p'],
+        'st_10': 0.5 * (v['10c'] + v['10p']) - v['atm'],
+    }
+
+
+def cross_pricer(pricer_1, pricer_2, orientation='product'):
+    # Cross market from the leg markets (same expiry). Domestic currency of the
+    # cross is leg2's domestic (product) or leg2's foreign (ratio).
+    _check_orientation(orientation)
+    if not np.allclose(pricer_1.T, pricer_2.T):
+        raise ValueError("Legs must share the same expiry")
+    if orientation == 'product':
+        return VanillaFxOptionPricer(pricer_1.S * pricer_2.S, pricer_2.rd, pricer_1.F * pricer_2.F, pricer_1.T)
+    return VanillaFxOptionPricer(pricer_1.S / pricer_2.S, pricer_2.rf, pricer_1.F / pricer_2.F, pricer_1.T)
+
+
+def triangulate(leg_1, leg_2, correlation, pricer, orientation='product', model='spline'):
+    # Cross VolatilitySurface constructed against pricer (the cross market)
+    vols = cross_pillar_vols(pillar_vols(leg_1), pillar_vols(leg_2), correlation, orientation)
+    quotes = {name: float(value) for name, value in quotes_from_pillars(vols).items()}
+    surface = VolatilitySurface(**quotes, model=model)
+    surface.construct_smile(pricer)
+    return surface
+
+
+def _knot_strikes(S, rd, F, T, vols):
+    # Vectorized VanillaFxOptionPricer.get_delta_strike for every pillar of every cross.
+    # S, rd, F, T: (n,), vols: (n, 5). exp(-rf T) = exp(-rd T) F / S.
+    S, rd, F, T = (np.asarray(a, dtype=float)[:, None] for a in (S, rd, F, T))
+    chk = np.exp(-rd * T) * F / S
+    delta = np.array([knot[1] for knot in SMILE_KNOTS])
+    is_call = np.array([knot[2] == 'call' for knot in SMILE_KNOTS])
+    target = np.where(is_call, delta / chk, 1.0 - delta / chk)
+    with np.errstate(invalid='ignore'):
+        d1 = np.where((target > 0) & (target < 1), ndtri(target), np.nan)
+    vol_term = vols * np.sqrt(T)
+    return F / np.exp(vol_term * d1 - 0.5 * vol_term**2)
+
+
+def triangulate_many(legs_1, legs_2, correlations, pricers, orientation='product', model='spline'):
+    # Many crosses in one pass: pillar vols, quotes and (for the spline model) knot
+    # strikes are computed as arrays, only the per-cross spline fit remains a loop.
+    # Returns a list of surfaces in input order.
+    if model not in SMILE_MODELS:
+        raise ValueError(f"Unknown smile model: {model}")
+    n = len(pricers)
+    if not (len(legs_1) == len(legs_2) == n):
+        raise ValueError("legs_1, legs_2 and pricers must have the same length")
+    if n == 0:
+        return []
+
+    vols = cross_pillar_vols(
+        np.array([pillar_vols(s) for s in legs_1]), np.array([pillar_vols(s) for s in legs_2]),
+        np.broadcast_to(np.asarray(correlations, dtype=float), (n,)), orientation
+    )
+    quotes = quotes_from_pillars(vols)
+    rows = [{name: float(q[i]) for name, q in quotes.items()} for i in range(n)]
+
+    if model != 'spline':
+        surfaces = []
+        for row, pricer in zip(rows, pricers):
+            surface = VolatilitySurface(**row, model=model)
+            surface.construct_smile(pricer)
+            surfaces.append(surface)
+        return surfaces
+
+    strikes = _knot_strikes(*(np.array([getattr(p, attr) for p in pricers]) for attr in ('S', 'rd', 'F', 'T')), vols)
+    failed = np.flatnonzero(~np.all(np.isfinite(strikes), axis=1))
+    if len(failed):
+        raise ValueError(f"Knot strikes could not be solved for crosses {failed.tolist()}")
+    return [
+        VolatilitySurface.from_knots(row['atm_vol'], row['rr_25'], row['st_25'], row['rr_10'], row['st_10'],
+                                     strikes[i], vols[i])
+        for i, row in enumerate(rows)
+    ]
+
+
+class CrossSurfaceCache:
+    # Triangulated surfaces keyed by (legs, correlation, orientation, model, cross market).
+    # An entry is reused only while both legs are the same objects at the same
+    # VolatilitySurface.version; any rebuild of a leg (construct_smile,
+    # update_quotes) makes the next lookup recompute. Least recently used
+    # entries are evicted beyond maxsize.
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _key(leg_1, leg_2, correlation, pricer, orientation, model):
+        # Entries hold the legs, so their ids cannot be reused while cached
+        market = (pricer.S, float(pricer.rd), float(pricer.F), float(pricer.T))
+        return (id(leg_1), id(leg_2), float(correlation), orientation, model, market)
+
+    def _lookup(self, key, leg_1, leg_2):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        (ref_1, version_1), (ref_2, version_2), surface = entry
+        if ref_1 is leg_1 and ref_2 is leg_2 and version_1 == leg_1.version and version_2 == leg_2.version:
+            self._entries.move_to_end(key)
+            return surface
+        return None
+
+    def _store(self, key, leg_1, leg_2, surface):
+        self._entries[key] = ((leg_1, leg_1.version), (leg_2, leg_2.version), surface)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, leg_1, leg_2, correlation, pricer, orientation='product', model='spline'):
+        key = self._key(leg_1, leg_2, correlation, pricer, orientation, model)
+        surface = self._lookup(key, leg_1, leg_2)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = triangulate(leg_1, leg_2, correlation, pricer, orientation, model)
+        self._store(key, leg_1, leg_2, surface)
+        return surface
+
+    def get_many(self, legs_1, legs_2, correlations, pricers, orientation='product', model='spline'):
+        # Like get for each cross; all stale or missing crosses are rebuilt with one triangulate_many
+        correlations = np.broadcast_to(np.asarray(correlations, dtype=float), (len(pricers),))
+        keys, result, stale = [], [], []
+        for i, (leg_1, leg_2, rho, pricer) in enumerate(zip(legs_1, legs_2, correlations, pricers)):
+            key = self._key(leg_1, leg_2, rho, pricer, orientation, model)
+            surface = self._lookup(key, leg_1, leg_2)
+            keys.append(key)
+            result.append(surface)
+            if surface is None:
+                stale.append(i)
+        self.hits += len(result) - len(stale)
+        self.misses += len(stale)
+
+        if stale:
+            fresh = triangulate_many(
+                [legs_1[i] for i in stale], [legs_2[i] for i in stale],
+                correlations[stale], [pricers[i] for i in stale], orientation, model
+            )
+            for i, surface in zip(stale, fresh):
+                self._store(keys[i], legs_1[i], legs_2[i], surface)
+                result[i] = surface
+        return result
+
+    def clear(self):
+        self._entries.clear()